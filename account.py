@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from typing import Callable, Dict, List
+
+from clock import wall_clock
+from market_stream import BINANCE_STREAM_URL, WebSocketStream
+
+
+class UserDataStream(WebSocketStream):
+    """
+    Listen to the account's user-data stream and dispatch every event to the
+    callbacks subscribed to its type (e.g. 'outboundAccountPosition',
+    'executionReport').
+    """
+
+    def __init__(self, client, url: str = BINANCE_STREAM_URL,
+                 keepalive_interval: float = 30 * 60, reconnect_delay: float = 1):
+        super().__init__(url, reconnect_delay)
+        self.client = client
+        self.keepalive_interval = keepalive_interval
+        self.listen_key = None
+        self._keepalive_task = None
+
+        self._callbacks: Dict[str, List[Callable[[Dict], None]]] = {}
+
+    @property
+    def stream_url(self) -> str:
+        return f'{self.url}/ws/{self.listen_key}'
+
+    def subscribe(self, event_type: str, callback: Callable[[Dict], None]):
+        self._callbacks.setdefault(event_type, []).append(callback)
+
+    async def _resolve_url(self) -> str:
+        # A new listen key per connection, requested off the event loop
+        self.listen_key = await asyncio.get_running_loop().run_in_executor(
+            None, self.client.stream_get_listen_key)
+        return self.stream_url
+
+    def _connected(self):
+        # Restarted on every connection, a failed keepalive must not end it
+        self._keepalive_task = asyncio.ensure_future(self._keepalive())
+
+    def _disconnected(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+
+    async def _keepalive(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await loop.run_in_executor(None, self.client.stream_keepalive,
+                                           self.listen_key)
+            except Exception as e:
+                print(f'User data stream keepalive failed\n{e}')
+
+    def _handle(self, event: Dict):
+        for callback in self._callbacks.get(event.get('e'), []):
+            callback(event)
+
+
+class AccountState:
+    """
+    Cached free balance of every asset. Balances are kept up to date by a
+    user-data stream when one is given, and reconciled over REST every
+    reconcile_interval seconds and after every trade.
+    """
+
+    def __init__(self, client, stream: UserDataStream = None,
+                 reconcile_interval: float = 300, clock=wall_clock):
+        self.client = client
+        self.clock = clock
+        self.stream = stream
+        self.reconcile_interval = reconcile_interval
+
+        self.balances: Dict[str, float] = {}
+        self.last_reconcile = None
+        self._lock = threading.Lock()
+
+        if stream is not None:
+            stream.subscribe('outboundAccountPosition', self._on_account_position)
+            stream.subscribe('balanceUpdate', self._on_balance_update)
+
+        self.reconcile()
+
+    def free(self, asset: str) -> float:
+        if self.clock.time() - self.last_reconcile > self.reconcile_interval:
+            self.reconcile()
+        with self._lock:
+            return self.balances.get(asset, 0.0)
+
+    def reconcile(self):
+        """Reload every balance with a single account request"""
+        account = self.client.get_account()
+        with self._lock:
+            self.balances = {balance['asset']: float(balance['free'])
+                             for balance in account['balances']}
+            self.last_reconcile = self.clock.time()
+
+    def _on_account_position(self, event: Dict):
+        with self._lock:
+            for balance in event['B']:
+                self.balances[balance['a']] = float(balance['f'])
+
+    def _on_balance_update(self, event: Dict):
+        with self._lock:
+            self.balances[event['a']] = \
+                self.balances.get(event['a'], 0.0) + float(event['d'])
@@ -3,11 +3,12 @@ from binance.client import Client
 api_key = 'INSERT BINANCE API KEY'
 api_secret = 'INSERT BINANCE API SECRET KEY'
 
-client = Client(api_key, api_secret)
-
-
-
-
-
-
 
+def __getattr__(name):
+    # The client is created on first use of api.client, so modules can be
+    # imported (e.g. for backtesting) without credentials or network access
+    if name == 'client':
+        global client
+        client = Client(api_key, api_secret)
+        return client
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
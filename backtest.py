@@ -0,0 +1,102 @@
+"""
+Offline backtesting: replay recorded prices and 24hr changes through the real
+Bot decision logic against a SimulatedClient, with no network access.
+
+    python backtest.py replay.npz [--balance 1000] [--fee 0.001] [--slippage 0]
+
+replay.npz holds pairs (n,), timestamps (T,), prices (T, n) and changes (T, n).
+"""
+import argparse
+import contextlib
+import os
+import sys
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+from account import AccountState
+from bot import Bot
+from bucket import Bucket
+from clock import VirtualClock
+from exchange_info import ExchangeInfo
+from orders import OrderTracker
+from sim_client import ReplayFinished, SimulatedClient, Trade
+from strategies_avg_baselines import SNAPSHOT_QUEUE_SIZE
+
+
+class BacktestResult(NamedTuple):
+    trades: List[Trade]
+    equity: np.ndarray  # (ticks, 2) of (timestamp, value in quote asset)
+
+
+def run_backtest(strategy_configuration, pairs: Sequence[str],
+                 timestamps: np.ndarray, prices: np.ndarray, changes: np.ndarray,
+                 initial_balance: float = 1000, fee: float = 0.001,
+                 slippage: float = 0.0,
+                 snapshot_queue_size: int = SNAPSHOT_QUEUE_SIZE,
+                 verbose: bool = False) -> BacktestResult:
+    """
+    Replay (timestamps x pairs) prices and 24hr changes through Bot.step until
+    the data runs out. Exceptions other than the end of the replay restart the
+    step, as Bot.run does live.
+    """
+    clock = VirtualClock(float(timestamps[0]))
+    client = SimulatedClient(pairs, prices, changes, timestamps, clock,
+                             {'USDT': initial_balance}, fee, slippage)
+
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        try:
+            bucket = Bucket(list(pairs), snapshot_queue_size,
+                            client=client, clock=clock)
+            bot = Bot(strategy_configuration, bucket, 'USDT',
+                      account=AccountState(client, clock=clock),
+                      exchange_info=ExchangeInfo(client, bucket.symbols,
+                                                 path=None, clock=clock),
+                      orders=OrderTracker(client, clock=clock),
+                      client=client, clock=clock)
+
+            while True:
+                try:
+                    bot.step()
+                except ReplayFinished:
+                    raise
+                except Exception as e:
+                    print(f'Exception raised\n{e}\nRestarting...')
+        except ReplayFinished:
+            pass
+
+    return BacktestResult(client.trades, np.array(client.equity))
+
+
+def load_replay(path: str):
+    data = np.load(path)
+    return ([str(pair) for pair in data['pairs']], data['timestamps'],
+            data['prices'], data['changes'])
+
+
+def main():
+    from configuration import STRATEGY_CONFIGURATION
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('replay', help='.npz file of pairs, timestamps, '
+                                       'prices and changes')
+    parser.add_argument('--balance', type=float, default=1000)
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--slippage', type=float, default=0.0)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    result = run_backtest(STRATEGY_CONFIGURATION, *load_replay(args.replay),
+                          initial_balance=args.balance, fee=args.fee,
+                          slippage=args.slippage, verbose=args.verbose)
+
+    for trade in result.trades:
+        print(trade)
+    start, end = result.equity[0, 1], result.equity[-1, 1]
+    print(f'{len(result.trades)} trades, equity {start} -> {end} USDT '
+          f'({(end - start) / start * 100:+.2f}%)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,733 @@
+"""
+Batched simulation: replay one market through N strategy configurations at
+once. The market data of a tick is read once and the Bot's trading, rebound,
+confirmation and profit retention state machines are evaluated with NumPy
+arrays over the configuration axis.
+
+Every configuration follows the same sequence of decisions and fills as
+run_backtest with the Bot and a SimulatedClient (without slippage): each
+configuration keeps its own program counter into Bot.step and fetches a new
+tick wherever the Bot would, so rebound waits, confirmation rounds and
+cooldowns consume the same ticks. Results only differ when two symbols tie
+for the largest fall.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+
+from strategies_avg_baselines import SNAPSHOT_QUEUE_SIZE, SNAPSHOT_REFRESH_RATE
+from strategy import COMPONENTS, DOMAINS, PARAMETERS, RegimeSelector, \
+    StrategyTable
+
+YEAR = 365 * 86400
+USDT = -1
+
+# Program counters, one per point of Bot.step where a decision resumes
+(FETCH, DONE, STEP, FC_ITER, FC_AFTER, FC_BUY, CF_ITER, CF_AFTER, CF_PROFIT,
+ CF_CHECK, SELL, TRADE_SNAPSHOT, TAIL, TAIL_SNAPSHOT, TAIL_PUSH, STATUS,
+ NEXT_STEP, CONFIRM_START, CONFIRM_ROUND) = range(19)
+PC_COUNT = CONFIRM_ROUND + 1
+
+# Confirmations and where each resumes once it fails or succeeds
+FC, CF, PROFIT_CF, PROFIT_TAIL = range(4)
+CONFIRM_FAILED = np.array([FC_AFTER, CF_AFTER, CF_CHECK, TAIL_SNAPSHOT])
+CONFIRM_SUCCEEDED = np.array([FC_BUY, SELL, SELL, SELL])
+
+TRADE_DTYPE = [('configuration', 'i8'), ('tick', 'i8'), ('timestamp', 'f8'),
+               ('side', 'U4'), ('symbol', 'i8'), ('quantity', 'f8'),
+               ('price', 'f8'), ('commission', 'f8')]
+
+
+def _sequential_sum(window: np.ndarray) -> np.ndarray:
+    """
+    Sum over axis 1 adding one row at a time, as SnapshotRing does. cumsum
+    always does, sum switches to pairwise summation along contiguous axes.
+    """
+    return window.cumsum(axis=1)[:, -1]
+
+
+class BatchResult(NamedTuple):
+    metrics: Dict[str, np.ndarray]  # objective -> value of every configuration
+    trades: np.ndarray  # TRADE_DTYPE records, in execution order
+    equity: Optional[np.ndarray]  # (configurations x ticks), nan when skipped
+
+
+class BatchSimulation:
+    """
+    Simulate len(strategy_configurations) Bots on the same replay. The
+    configurations may differ in any Strategy field but must share their
+    component names and activation intervals.
+    """
+
+    def __init__(self, strategy_configurations: Sequence[Dict],
+                 timestamps: np.ndarray, prices: np.ndarray, changes: np.ndarray,
+                 initial_balance: float = 1000, fee: float = 0.001,
+                 snapshot_queue_size: int = SNAPSHOT_QUEUE_SIZE,
+                 max_price_age: float = 5, step_size: str = '0.00000100',
+                 record_equity: bool = False):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.prices = prices
+        self.changes = changes
+        self.initial_balance = initial_balance
+        self.fee = fee
+        self.queue_size = snapshot_queue_size
+        self.max_price_age = max_price_age
+        # Order quantities are floored as Bot.buy / Bot.sell do with the
+        # lot precision ExchangeInfo derives from the step size
+        self.lot = float(10 ** (step_size.find('1') - 2))
+
+        self.selectors = self._selectors(strategy_configurations)
+        # (configuration x BASELINE x 24HR x LATEST x INVERSION x parameter)
+        # composite parameters, as the Bot's StrategyTable holds them
+        self.composites = np.stack([structured_to_unstructured(
+            StrategyTable(configuration).params, np.float64)
+            for configuration in strategy_configurations])
+
+        n = len(strategy_configurations)
+        s = prices.shape[1]
+        self.n = n
+        self.record_equity = record_equity
+
+        # Program counter, and where to resume after the pending fetch
+        self.pc = np.full(n, FETCH)
+        self.resume = np.full(n, STEP)
+        self.next_tick = np.full(n, 2)
+        self.cursor = np.ones(n, dtype=np.int64)
+        self.now = np.full(n, self.timestamps[1])
+
+        # Strategy
+        self.index = np.zeros((n, len(COMPONENTS)), dtype=np.int64)
+        self.table = np.zeros((n, len(PARAMETERS)))
+        self.params = {name: self.table[:, i]
+                       for i, (name, _) in enumerate(PARAMETERS)}
+        self._compose(np.arange(n))
+
+        # Snapshot queue, as the ticks it holds
+        self.ring = np.zeros((n, snapshot_queue_size), dtype=np.int64)
+        self.queue_count = np.zeros(n, dtype=np.int64)
+        self.average = np.zeros((n, s))
+        self.snapshot_time = np.zeros(n)
+
+        # BASELINE indicator history of the INVERSION indicator
+        self.history = np.zeros((n, SNAPSHOT_QUEUE_SIZE))
+        self.history_count = np.zeros(n, dtype=np.int64)
+        self.history_sum = np.zeros(n)
+        self.history_time = np.zeros(n)
+
+        # Suspensions
+        self.suspended = np.zeros((n, s), dtype=bool)
+        self.suspended_since = np.zeros((n, s))
+
+        # Portfolio
+        self.usdt = np.full(n, float(initial_balance))
+        self.quantity = np.zeros((n, s))
+        self.holding = np.full(n, USDT)
+        self.initial_value = np.full(n, float(initial_balance))
+        self.profit_snapshot = np.zeros(n)
+        self.profit_delta = np.full(n, np.nan)  # nan until first measured
+        self.priming = np.zeros(n, dtype=bool)
+        self.last_sell_time = np.full(n, self.timestamps[1])
+
+        # Trading loops
+        self.loop_start = np.zeros(n)
+        self.loop_elapsed = np.zeros(n)
+        self.target_delta = np.zeros(n)
+        self.new_delta = np.zeros(n)
+        self.rebound_ratio = np.zeros(n)
+        self.rebound_snapshot = np.zeros((n, s))
+        self.holding_snapshot = np.zeros(n)
+
+        # Confirmations
+        self.confirm_kind = np.zeros(n, dtype=np.int64)
+        self.confirm_parameter = np.zeros(n)
+        self.confirm_round = np.zeros(n, dtype=np.int64)
+        self.confirm_repetition = np.zeros(n)
+        self.confirm_delay = np.zeros(n)
+        self.next_round = np.zeros(n)
+
+        # Results
+        self._trades: List[np.ndarray] = []
+        self.equity = np.full((n, len(self.timestamps)), np.nan) \
+            if record_equity else None
+        self.last_value = np.full(n, float(initial_balance))
+        self.peak = np.full(n, float(initial_balance))
+        self.max_drawdown = np.zeros(n)
+        self.return_count = np.zeros(n)
+        self.return_mean = np.zeros(n)
+        self.return_m2 = np.zeros(n)
+
+        # Bucket initialization fetched tick 1 after the client's tick 0, the
+        # Bot then took its first snapshot
+        for tick in (0, 1):
+            self._record(np.arange(n), tick)
+        self._push(np.arange(n), 1)
+
+        self._handlers = {
+            STEP: self._step, FC_ITER: self._fc_iter, FC_AFTER: self._fc_after,
+            FC_BUY: self._fc_buy, CF_ITER: self._cf_iter,
+            CF_AFTER: self._cf_after, CF_PROFIT: self._cf_profit,
+            CF_CHECK: self._cf_check, SELL: self._sell,
+            TRADE_SNAPSHOT: self._trade_snapshot, TAIL: self._tail,
+            TAIL_SNAPSHOT: self._tail_snapshot, TAIL_PUSH: self._tail_push,
+            STATUS: self._status, NEXT_STEP: self._next_step,
+            CONFIRM_START: self._confirm_start,
+            CONFIRM_ROUND: self._confirm_round}
+
+    @staticmethod
+    def _selectors(strategy_configurations: Sequence[Dict]) -> Dict:
+        reference = strategy_configurations[0]
+        for configuration in strategy_configurations[1:]:
+            for component in COMPONENTS:
+                if [(strategy.name, strategy.interval)
+                        for strategy in configuration[component]] != \
+                        [(strategy.name, strategy.interval)
+                         for strategy in reference[component]]:
+                    raise ValueError(f'{component} strategies differ in names '
+                                     f'or activation intervals across the batch')
+        return {component: RegimeSelector(reference[component],
+                                          DOMAINS[component])
+                for component in COMPONENTS}
+
+    def run(self) -> BatchResult:
+        for tick in range(2, len(self.timestamps)):
+            arriving = np.flatnonzero((self.pc == FETCH) &
+                                      (self.next_tick == tick))
+            if not arriving.size:
+                if not (self.pc == FETCH).any():
+                    break
+                continue
+            self.pc[arriving] = self.resume[arriving]
+            self.cursor[arriving] = tick
+            self.now[arriving] = np.maximum(self.now[arriving],
+                                            self.timestamps[tick])
+            self._record(arriving, tick)
+
+            self._tick = tick
+            self._price = self.prices[tick]
+            self._change = self.changes[tick]
+            self._run_tick()
+
+        return BatchResult(self._metrics(), self._trade_log(), self.equity)
+
+    def _run_tick(self):
+        """Advance every configuration at this tick until it fetches the next"""
+        while True:
+            pending = np.flatnonzero(np.bincount(self.pc, minlength=PC_COUNT))
+            pending = pending[pending > DONE]
+            if not pending.size:
+                return
+            for pc in pending:
+                self._handlers[pc](np.flatnonzero(self.pc == pc))
+
+    # Time and market data
+    ############################################################################
+    def _fetch(self, idx: np.ndarray, resume: int):
+        """Request the next tick, or the latest one the clock has passed"""
+        tick = np.maximum(self.cursor[idx] + 1,
+                          np.searchsorted(self.timestamps, self.now[idx]))
+        done = tick >= len(self.timestamps)
+        self.pc[idx[done]] = DONE
+        waiting = idx[~done]
+        self.pc[waiting] = FETCH
+        self.resume[waiting] = resume
+        self.next_tick[waiting] = tick[~done]
+
+    def _stale(self, idx: np.ndarray, max_age) -> np.ndarray:
+        return self.now[idx] - self.timestamps[self.cursor[idx]] >= max_age
+
+    def _record(self, idx: np.ndarray, tick: int):
+        value = self.usdt[idx] + self.quantity[idx] @ self.prices[tick]
+        if self.record_equity:
+            self.equity[idx, tick] = value
+        if tick:
+            returns = (value - self.last_value[idx]) / self.last_value[idx]
+            self.return_count[idx] += 1
+            delta = returns - self.return_mean[idx]
+            self.return_mean[idx] += delta / self.return_count[idx]
+            self.return_m2[idx] += delta * (returns - self.return_mean[idx])
+        self.last_value[idx] = value
+        self.peak[idx] = np.maximum(self.peak[idx], value)
+        self.max_drawdown[idx] = np.maximum(
+            self.max_drawdown[idx], (self.peak[idx] - value) / self.peak[idx])
+
+    def _push(self, idx: np.ndarray, tick: int):
+        """Bucket.take_snapshot of the given tick"""
+        if not idx.size:
+            return
+        slot = self.queue_count[idx] % self.queue_size
+        self.ring[idx, slot] = tick
+        self.queue_count[idx] += 1
+
+        # Summed oldest first as SnapshotRing does, shorter queues add zeros
+        length = np.minimum(self.queue_count[idx], self.queue_size)
+        forward = np.arange(int(length.max()))
+        slots = (self.queue_count[idx][:, None] - length[:, None] + forward) % \
+            self.queue_size
+        window = self.prices[self.ring[idx[:, None], slots]]
+        window[forward >= length[:, None]] = 0
+        self.average[idx] = _sequential_sum(window) / length[:, None]
+        self.snapshot_time[idx] = self.timestamps[tick]
+
+    def _snapshot_refresh(self, idx: np.ndarray):
+        due = idx[self.now[idx] - self.snapshot_time[idx] >
+                  self.params['snapshot_refresh_rate'][idx]]
+        if due.size:
+            self._push(due, self._tick)
+
+    def _max_fall(self, idx: np.ndarray) -> np.ndarray:
+        """Symbol of every configuration's largest fall among tradable ones"""
+        average = self.average[idx]
+        deltas = (self._price - average) / average * 100
+        deltas[self.suspended[idx]] = np.inf
+        return np.argmin(deltas, axis=1)
+
+    # Strategy
+    ############################################################################
+    def _compose(self, idx: np.ndarray):
+        """Composite Strategy parameters of the selected components"""
+        self.table[idx] = self.composites[(idx,) + tuple(self.index[idx].T)]
+
+    def _select(self, component: str, values: np.ndarray, scale: float = 1):
+        selector = self.selectors[component]
+        bounds = np.array([scale * bound for bound in selector.upper_bounds])
+        index = np.searchsorted(bounds, values, side='left')
+        inside = (scale * selector.lower <= values) & (values <= bounds[-1])
+        return np.where(inside, index, -1)
+
+    def _strategize(self, idx: np.ndarray) -> np.ndarray:
+        """Bot._strategize, return which configurations switched strategy"""
+        cardinality = len(self._price)
+        average = self.average[idx]
+        above_average = np.count_nonzero(self._price > average, axis=1)
+        positive_24hr = np.count_nonzero(self._change > 0)
+
+        # Average of the latest n snapshots, at most as many as queued
+        length = np.minimum(self.queue_count[idx], self.queue_size)
+        n = np.minimum(self.params['latest_snapshot_count'][idx].astype(np.int64),
+                       length)
+        back = np.arange(1, int(n.max()) + 1)
+        slots = (self.queue_count[idx][:, None] - back) % self.queue_size
+        window = self.prices[self.ring[idx[:, None], slots]]
+        window[back > n[:, None]] = 0
+        latest = _sequential_sum(window) / n[:, None]
+        above_latest = np.count_nonzero(self._price > latest, axis=1)
+
+        baseline = above_average / cardinality
+        self._history_push(idx, baseline)
+        length = np.minimum(self.history_count[idx], self.history.shape[1])
+        inversion = baseline - self.history_sum[idx] / length
+
+        selected = np.stack([
+            self._select('BASELINE', above_average, cardinality),
+            np.broadcast_to(self._select('24HR', positive_24hr, cardinality),
+                            len(idx)),
+            self._select('LATEST', above_latest, cardinality),
+            self._select('INVERSION', inversion)], axis=1)
+        current = self.index[idx]
+        selected = np.where(selected >= 0, selected, current)
+        switched = (selected != current).any(axis=1)
+
+        changed = idx[switched]
+        if changed.size:
+            self.index[changed] = selected[switched]
+            self._compose(changed)
+        return switched
+
+    def _history_push(self, idx: np.ndarray, baseline: np.ndarray):
+        """IndicatorHistory.push wherever the latest entry is old enough"""
+        due = (self.history_count[idx] == 0) | \
+              (self.now[idx] - self.history_time[idx] > SNAPSHOT_REFRESH_RATE)
+        rows, values = idx[due], baseline[due]
+        if not rows.size:
+            return
+        capacity = self.history.shape[1]
+        slot = self.history_count[rows] % capacity
+        full = self.history_count[rows] >= capacity
+        self.history_sum[rows[full]] -= self.history[rows[full], slot[full]]
+        self.history[rows, slot] = values
+        self.history_time[rows] = self.now[rows]
+        self.history_sum[rows] += values
+        self.history_count[rows] += 1
+
+        revolution = rows[self.history_count[rows] % capacity == 0]
+        if revolution.size:
+            self.history_sum[revolution] = self.history[revolution].sum(axis=1)
+
+    def _prune(self, idx: np.ndarray):
+        """Bot._pruning_loop"""
+        empty = self.suspended[idx].all(axis=1)
+        self.suspended[idx[empty]] = False
+
+        rows = idx[~empty]
+        if not rows.size:
+            return
+        diff = np.abs(self._change - float(self._change.mean()))
+        now = self.now[rows][:, None]
+        suspend = ~self.suspended[rows] & \
+            (diff > self.params['suspension_threshold'][rows][:, None])
+        self.suspended[rows] |= suspend
+        self.suspended_since[rows] = np.where(suspend, now,
+                                              self.suspended_since[rows])
+        expired = self.suspended[rows] & \
+            (now - self.suspended_since[rows] >
+             self.params['suspension_time'][rows][:, None])
+        self.suspended[rows] &= ~expired
+
+    # Bot.step
+    ############################################################################
+    def _step(self, idx: np.ndarray):
+        self._strategize(idx)
+        self._prune(idx)
+
+        cooldown = (self.queue_count[idx] < self.queue_size) | \
+                   (self.now[idx] - self.last_sell_time[idx] <
+                    self.params['trading_cooldown_time'][idx])
+        self.pc[idx[cooldown]] = TAIL
+        idx = idx[~cooldown]
+
+        fiat = idx[self.holding[idx] == USDT]
+        crypto = idx[self.holding[idx] != USDT]
+
+        # max_fall of an empty bucket raises, Bot.run restarts the step
+        empty = self.suspended[fiat].all(axis=1)
+        self._fetch(fiat[empty], STEP)
+        fiat = fiat[~empty]
+        if fiat.size:
+            self._fc_enter(fiat)
+        if crypto.size:
+            self._cf_enter(crypto)
+
+    def _fc_enter(self, idx: np.ndarray):
+        symbol = self._max_fall(idx)
+        price = self._price[symbol]
+        average = self.average[idx, symbol]
+        delta = 100 * (price - average) / average
+
+        exceeded = delta < -self.params['fc_delta_threshold'][idx]
+        self.pc[idx[~exceeded]] = TAIL
+        idx, delta = idx[exceeded], delta[exceeded]
+
+        self.target_delta[idx] = delta
+        self.loop_start[idx] = self.now[idx]
+        self.rebound_snapshot[idx] = self.average[idx]
+        waiting = self.params['rebound_wait_time'][idx] > 0
+        self._fetch(idx[waiting], FC_ITER)
+        self.pc[idx[~waiting]] = FC_BUY
+
+    def _cf_enter(self, idx: np.ndarray):
+        holding = self.holding[idx]
+        average = self.average[idx, holding]
+        delta = 100 * (self._price[holding] - average) / average
+
+        exceeded = delta > self.params['cf_delta_threshold'][idx]
+        self.pc[idx[~exceeded]] = TAIL
+        idx, delta, average = idx[exceeded], delta[exceeded], average[exceeded]
+
+        self.target_delta[idx] = delta
+        self.holding_snapshot[idx] = average
+        self.loop_start[idx] = self.now[idx]
+        waiting = self.params['rebound_wait_time'][idx] > 0
+        self._fetch(idx[waiting], CF_ITER)
+        self.pc[idx[~waiting]] = SELL
+
+    def _fc_iter(self, idx: np.ndarray):
+        """One iteration of the Fiat-Crypto rebound wait"""
+        self._snapshot_refresh(idx)
+        switched = self._strategize(idx)
+
+        symbol = self._max_fall(idx)
+        snapshot = self.rebound_snapshot[idx, symbol]
+        self.loop_elapsed[idx] = self.now[idx] - self.loop_start[idx]
+        new_delta = (self._price[symbol] - snapshot) / snapshot * 100
+        ratio = (self.target_delta[idx] - new_delta) / self.target_delta[idx]
+        self.new_delta[idx] = new_delta
+        self.rebound_ratio[idx] = ratio
+
+        aborted = switched & \
+            ~(new_delta < -self.params['fc_delta_threshold'][idx])
+        confirming = ~aborted & (ratio > self.params['fc_rebound_ratio'][idx])
+        self.pc[idx[aborted]] = TAIL
+        self.pc[idx[~aborted & ~confirming]] = FC_AFTER
+        self._confirm(idx[confirming], FC)
+
+    def _fc_after(self, idx: np.ndarray):
+        falling = idx[self.rebound_ratio[idx] < 0]
+        self.target_delta[falling] = self.new_delta[falling]
+
+        waiting = self.loop_elapsed[idx] < self.params['rebound_wait_time'][idx]
+        self._fetch(idx[waiting], FC_ITER)
+        self.pc[idx[~waiting]] = FC_BUY
+
+    def _fc_buy(self, idx: np.ndarray):
+        symbol = self._max_fall(idx)
+        price = self._price[symbol]
+        quantity = np.floor(self.usdt[idx] / price * self.lot) / self.lot
+        cost = quantity * price
+
+        # A rejected order raises out of Bot.step, which Bot.run restarts
+        rejected = (quantity <= 0) | (cost > self.usdt[idx])
+        self._fetch(idx[rejected], STEP)
+        idx, symbol, price, quantity, cost = (
+            array[~rejected] for array in (idx, symbol, price, quantity, cost))
+        commission = quantity * self.fee
+
+        self.usdt[idx] -= cost
+        self.quantity[idx, symbol] = \
+            self.quantity[idx, symbol] + quantity - commission
+        self.holding[idx] = symbol
+        self._log(idx, 'BUY', symbol, quantity, price, commission)
+        self.pc[idx] = TRADE_SNAPSHOT
+
+    def _cf_iter(self, idx: np.ndarray):
+        """One iteration of the Crypto-Fiat rebound wait"""
+        self._snapshot_refresh(idx)
+        self.loop_elapsed[idx] = self.now[idx] - self.loop_start[idx]
+        switched = self._strategize(idx)
+
+        snapshot = self.holding_snapshot[idx]
+        new_delta = (self._price[self.holding[idx]] - snapshot) / snapshot * 100
+        delta = self.target_delta[idx]
+        ratio = (delta - new_delta) / delta
+        self.new_delta[idx] = new_delta
+        self.rebound_ratio[idx] = ratio
+
+        aborted = switched & ~(delta > self.params['cf_delta_threshold'][idx])
+        confirming = ~aborted & (ratio > self.params['cf_rebound_ratio'][idx])
+        self.pc[idx[aborted]] = TAIL
+        self.pc[idx[~aborted & ~confirming]] = CF_AFTER
+        self._confirm(idx[confirming], CF)
+
+    def _cf_after(self, idx: np.ndarray):
+        falling = idx[self.rebound_ratio[idx] < 0]
+        self.target_delta[falling] = self.new_delta[falling]
+        self.pc[idx] = CF_PROFIT
+
+    def _cf_profit(self, idx: np.ndarray):
+        triggered = self._profit_retention(idx)
+        self.pc[idx[~triggered]] = CF_CHECK
+        self._confirm(idx[triggered], PROFIT_CF)
+
+    def _cf_check(self, idx: np.ndarray):
+        waiting = self.loop_elapsed[idx] < self.params['rebound_wait_time'][idx]
+        self._fetch(idx[waiting], CF_ITER)
+        self.pc[idx[~waiting]] = SELL
+
+    def _sell(self, idx: np.ndarray):
+        symbol = self.holding[idx]
+        price = self._price[symbol]
+        quantity = np.floor(self.quantity[idx, symbol] * self.lot) / self.lot
+
+        rejected = (quantity <= 0) | (quantity > self.quantity[idx, symbol])
+        self._fetch(idx[rejected], STEP)
+        idx, symbol, price, quantity = (
+            array[~rejected] for array in (idx, symbol, price, quantity))
+        cost = quantity * price
+        commission = cost * self.fee
+
+        self.quantity[idx, symbol] -= quantity
+        self.usdt[idx] = self.usdt[idx] + cost - commission
+        self.holding[idx] = USDT
+        self.last_sell_time[idx] = self.now[idx]
+        self.priming[idx] = False
+        self.profit_delta[idx] = np.nan
+        self._log(idx, 'SELL', symbol, quantity, price, commission)
+        self.pc[idx] = TRADE_SNAPSHOT
+
+    def _trade_snapshot(self, idx: np.ndarray):
+        """take_snapshot and the profit snapshot following every trade"""
+        stale = self._stale(idx, self.max_price_age)
+        self._fetch(idx[stale], TRADE_SNAPSHOT)
+        idx = idx[~stale]
+        self._push(idx, self._tick)
+        self.profit_snapshot[idx] = self._profit(idx)
+        self.pc[idx] = TAIL
+
+    def _tail(self, idx: np.ndarray):
+        """Remainder of Bot.step after the trading loops"""
+        crypto = idx[self.holding[idx] != USDT]
+        triggered = self._profit_retention(crypto)
+        self.pc[idx] = TAIL_SNAPSHOT
+        self._confirm(crypto[triggered], PROFIT_TAIL)
+
+    def _tail_snapshot(self, idx: np.ndarray):
+        due = self.now[idx] - self.snapshot_time[idx] > \
+              self.params['snapshot_refresh_rate'][idx]
+        self.pc[idx[~due]] = STATUS
+        idx = idx[due]
+        stale = self._stale(idx, self.max_price_age)
+        self._fetch(idx[stale], TAIL_PUSH)
+        self._tail_push(idx[~stale])
+
+    def _tail_push(self, idx: np.ndarray):
+        self._push(idx, self._tick)
+        self.pc[idx] = STATUS
+
+    def _status(self, idx: np.ndarray):
+        # get_status refreshes the holding's price before the next step
+        stale = (self.holding[idx] != USDT) & \
+            self._stale(idx, self.max_price_age)
+        self._fetch(idx[stale], NEXT_STEP)
+        self._fetch(idx[~stale], STEP)
+
+    def _next_step(self, idx: np.ndarray):
+        self._fetch(idx, STEP)
+
+    # Profit retention and confirmations
+    ############################################################################
+    def _profit(self, idx: np.ndarray) -> np.ndarray:
+        """Bot.current_profit"""
+        crypto = self.holding[idx] != USDT
+        symbol = np.where(crypto, self.holding[idx], 0)
+        balance = np.where(crypto, self._price[symbol] *
+                           self.quantity[idx, symbol], self.usdt[idx])
+        return balance - self.initial_value[idx]
+
+    def _profit_retention(self, idx: np.ndarray, confirming=False) -> np.ndarray:
+        """
+        Bot._profit_retention of configurations holding crypto, or its
+        confirmation logic, returning which ones trigger
+        """
+        symbol = self.holding[idx]
+        balance = self._price[symbol] * self.quantity[idx, symbol]
+        delta = balance - self.initial_value[idx] - self.profit_snapshot[idx]
+
+        unset = np.isnan(self.profit_delta[idx]) & (not confirming)
+        self.profit_delta[idx[unset]] = delta[unset]
+
+        peak = np.where(delta > self.profit_delta[idx], delta,
+                        self.profit_delta[idx])
+        self.profit_delta[idx[~unset]] = peak[~unset]
+        if not confirming:
+            primed = delta > \
+                self.params['profit_retention_activation_positive'][idx] / \
+                100 * balance
+            self.priming[idx[~unset & primed]] = True
+
+        negative = self.params['profit_retention_activation_negative'][idx] / \
+            100 * balance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            retraced = (delta - peak) / peak < \
+                -self.params['cf_rebound_ratio'][idx]
+        trigger = np.where(delta > 0, self.priming[idx] & retraced,
+                           np.abs(delta) > negative)
+        return trigger & ~unset
+
+    def _confirm(self, idx: np.ndarray, kind: int):
+        """Start Bot.confirm for the given kind of confirmation"""
+        if not idx.size:
+            return
+        self.confirm_kind[idx] = kind
+        if kind == FC:
+            self.confirm_parameter[idx] = self.target_delta[idx]
+            self.confirm_repetition[idx] = \
+                self.params['buy_confirmation_repetition'][idx]
+            self.confirm_delay[idx] = self.params['buy_confirmation_time'][idx]
+        else:
+            self.confirm_parameter[idx] = self.target_delta[idx]
+            self.confirm_repetition[idx] = \
+                self.params['sell_confirmation_repetition'][idx]
+            # The Crypto-Fiat loop confirms with the buy confirmation time
+            self.confirm_delay[idx] = self.params[
+                'buy_confirmation_time' if kind == CF
+                else 'sell_confirmation_time'][idx]
+        self.pc[idx] = CONFIRM_START
+
+    def _confirm_start(self, idx: np.ndarray):
+        stale = self._stale(idx, self.max_price_age)
+        self._fetch(idx[stale], CONFIRM_START)
+        idx = idx[~stale]
+        self.next_round[idx] = self.now[idx]
+        self.confirm_round[idx] = 0
+        self.pc[idx] = CONFIRM_ROUND
+
+    def _confirm_round(self, idx: np.ndarray):
+        kind = self.confirm_kind[idx]
+        done = self.confirm_round[idx] >= self.confirm_repetition[idx]
+        self.pc[idx[done]] = CONFIRM_SUCCEEDED[kind[done]]
+        idx, kind = idx[~done], kind[~done]
+
+        passed = np.zeros(len(idx), dtype=bool)
+        for k, logic in ((FC, self._fc_confirmation),
+                         (CF, self._cf_confirmation),
+                         (PROFIT_CF, self._profit_confirmation),
+                         (PROFIT_TAIL, self._profit_confirmation)):
+            rows = np.flatnonzero(kind == k)
+            if rows.size:
+                passed[rows] = logic(idx[rows])
+        self.pc[idx[~passed]] = CONFIRM_FAILED[kind[~passed]]
+        idx = idx[passed]
+
+        # Sleep until the next round, then refresh(delay)
+        self.next_round[idx] += self.confirm_delay[idx]
+        self.now[idx] += np.maximum(self.next_round[idx] - self.now[idx], 0)
+        self.confirm_round[idx] += 1
+        stale = self._stale(idx, self.confirm_delay[idx])
+        self._fetch(idx[stale], CONFIRM_ROUND)
+        self.pc[idx[~stale]] = CONFIRM_ROUND
+
+    def _fc_confirmation(self, idx: np.ndarray) -> np.ndarray:
+        symbol = self._max_fall(idx)
+        snapshot = self.rebound_snapshot[idx, symbol]
+        new_delta = (self._price[symbol] - snapshot) / snapshot * 100
+        delta = self.confirm_parameter[idx]
+        return (delta - new_delta) / delta > self.params['fc_rebound_ratio'][idx]
+
+    def _cf_confirmation(self, idx: np.ndarray) -> np.ndarray:
+        symbol = self.holding[idx]
+        average = self.average[idx, symbol]
+        new_delta = (self._price[symbol] - average) / average * 100
+        delta = self.confirm_parameter[idx]
+        return (delta - new_delta) / delta > self.params['cf_rebound_ratio'][idx]
+
+    def _profit_confirmation(self, idx: np.ndarray) -> np.ndarray:
+        return self._profit_retention(idx, confirming=True)
+
+    # Results
+    ############################################################################
+    def _log(self, idx, side, symbol, quantity, price, commission):
+        trades = np.empty(len(idx), dtype=TRADE_DTYPE)
+        trades['configuration'] = idx
+        trades['tick'] = self._tick
+        trades['timestamp'] = self.now[idx]
+        trades['side'] = side
+        trades['symbol'] = symbol
+        trades['quantity'] = quantity
+        trades['price'] = price
+        trades['commission'] = commission
+        self._trades.append(trades)
+
+    def _trade_log(self) -> np.ndarray:
+        if not self._trades:
+            return np.empty(0, dtype=TRADE_DTYPE)
+        return np.concatenate(self._trades)
+
+    def _metrics(self) -> Dict[str, np.ndarray]:
+        """The objectives of optimizer.metrics, of every configuration"""
+        trades = self._trade_log()
+        # Buy commissions are paid in the bought asset
+        fees = np.where(trades['side'] == 'BUY',
+                        trades['commission'] * trades['price'],
+                        trades['commission'])
+
+        std = np.sqrt(self.return_m2 / np.maximum(self.return_count, 1))
+        periods = YEAR / np.median(np.diff(self.timestamps))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where((self.return_count > 1) & (std > 0),
+                              self.return_mean / std * np.sqrt(periods), 0.0)
+
+        return {'return_pct': (self.last_value - self.initial_balance) /
+                              self.initial_balance * 100,
+                'sharpe': sharpe,
+                'max_drawdown_pct': self.max_drawdown * 100,
+                'trades': np.bincount(trades['configuration'], minlength=self.n),
+                'fees': np.bincount(trades['configuration'], weights=fees,
+                                    minlength=self.n)}
+
+
+def run_batch(strategy_configurations: Sequence[Dict], timestamps: np.ndarray,
+              prices: np.ndarray, changes: np.ndarray,
+              **options) -> BatchResult:
+    """Simulate every configuration on the replay, see BatchSimulation"""
+    return BatchSimulation(strategy_configurations, timestamps, prices, changes,
+                           **options).run()
@@ -0,0 +1,147 @@
+"""
+Compare the single-pass market_indicators kernel against the original
+per-coin loop of Bot._strategize, both fed from one snapshot queue: the
+legacy side averages a list of snapshot dicts as the original Bucket did, the
+kernel side reads the SnapshotRing averages.
+
+Prices move on exchange tick sizes and mostly stand still, so they often
+equal their averages exactly and any rounding difference in the averages
+shows up as a flipped comparison.
+
+Run from the repository root:
+    python -m benchmarks.bench_indicators
+"""
+import timeit
+
+import numpy as np
+
+from indicators import IndicatorHistory, market_indicators
+from snapshot_ring import SnapshotRing
+
+SIZES = [24, 200, 1000, 5000]
+HISTORY_SIZE = 120
+LATEST_SNAPSHOT_COUNT = 6
+REPEAT = 100
+
+
+def legacy_average_snapshot(snapshot_queue):
+    """Bucket.take_snapshot before the SnapshotRing"""
+    dict_ = {}
+    for coin in snapshot_queue[0][0]:
+        lst_snapshot = []
+        lst_24hr = []
+        for i in range(len(snapshot_queue)):
+            lst_snapshot.append(snapshot_queue[i][0][coin][0])
+            lst_24hr.append(snapshot_queue[i][0][coin][1])
+        dict_[coin] = (sum(lst_snapshot) / len(lst_snapshot),
+                       sum(lst_24hr) / len(lst_24hr))
+    return dict_, snapshot_queue[-1][1]
+
+
+def legacy_latest_baseline(snapshot_queue, latest_snapshot_count):
+    """The latest-window baseline of Bot._strategize before the SnapshotRing"""
+    latest_baseline = {}
+    for coin in snapshot_queue[0][0]:
+        lst_snapshot = []
+        for i in range(min(latest_snapshot_count, len(snapshot_queue))):
+            lst_snapshot.append(snapshot_queue[-(i + 1)][0][coin][0])
+        latest_baseline[coin] = sum(lst_snapshot) / len(lst_snapshot)
+    return latest_baseline
+
+
+def legacy_indicators(prices, average_snapshot, latest_baseline, strategy_queue,
+                      now, history_interval):
+    cardinality = len(prices[0])
+    sum_avg = 0
+    sum_24hr = 0
+    sum_latest = 0
+
+    for coin in prices[0]:
+        current_price = prices[0][coin][0]
+        if current_price > average_snapshot[0][coin][0]:
+            sum_avg += 1
+        if current_price > latest_baseline[coin]:
+            sum_latest += 1
+        if prices[0][coin][1] > 0:
+            sum_24hr += 1
+
+    baseline = sum_avg / cardinality
+    if (not strategy_queue) or now - strategy_queue[-1][-1] > history_interval:
+        strategy_queue.append((baseline, now))
+        if len(strategy_queue) > HISTORY_SIZE:
+            strategy_queue.pop(0)
+
+    inversion = baseline - sum(i for i, j in strategy_queue) / len(strategy_queue)
+    return {'BASELINE': baseline, '24HR': sum_24hr / cardinality,
+            'LATEST': sum_latest / cardinality, 'INVERSION': inversion}
+
+
+def market(size: int, rng: np.random.Generator):
+    """
+    Random walk of prices on exchange tick sizes (4 significant digits), most
+    of them unchanged from one tick to the next as on a quiet market, so
+    prices often equal their averages exactly.
+    """
+    coins = [f'C{i}' for i in range(size)]
+    prices = rng.uniform(0.01, 1000, size)
+    tick = 10.0 ** (np.floor(np.log10(prices)) - 3)
+    prices = np.round(prices / tick) * tick
+    while True:
+        moves = rng.choice([-2, -1, 0, 0, 0, 0, 0, 1, 2], size)
+        prices = np.round((prices + moves * tick) / tick) * tick
+        yield coins, prices, rng.uniform(-10, 10, size)
+
+
+def main():
+    print(f'{"symbols":>8} {"legacy (us)":>12} {"kernel (us)":>12} {"speedup":>8}')
+    for size in SIZES:
+        walk = market(size, np.random.default_rng(size))
+        history = IndicatorHistory(HISTORY_SIZE)
+        ring = SnapshotRing(size, HISTORY_SIZE)
+        strategy_queue = []
+        snapshot_queue = []
+
+        # Replay a few hundred ticks through both snapshot queues and check
+        # the indicators agree at every one
+        for tick in range(3 * HISTORY_SIZE):
+            coins, prices, changes = next(walk)
+            snapshot = dict(zip(coins, zip(prices.tolist(), changes.tolist())))
+            snapshot_queue.append((snapshot, tick))
+            if len(snapshot_queue) > HISTORY_SIZE:
+                snapshot_queue.pop(0)
+            ring.push(np.stack([prices, changes], axis=1), tick)
+
+            # The next tick is compared against the snapshots
+            coins, prices, changes = next(walk)
+            prices_dict = dict(zip(coins, zip(prices.tolist(), changes.tolist())))
+            average_dict = legacy_average_snapshot(snapshot_queue)
+            latest_dict = legacy_latest_baseline(snapshot_queue,
+                                                 LATEST_SNAPSHOT_COUNT)
+            averages = ring.average()[:, 0]
+            latest = ring.latest_average(LATEST_SNAPSHOT_COUNT)
+
+            expected = legacy_indicators((prices_dict, tick), average_dict,
+                                         latest_dict, strategy_queue, tick, 0)
+            actual = market_indicators(prices, averages, latest, changes,
+                                       history, tick, 0).as_dict()
+            for key in ('BASELINE', '24HR', 'LATEST'):
+                assert actual[key] == expected[key], (size, tick, key)
+            # The history mean is a running sum, the legacy one a fresh sum
+            assert abs(actual['INVERSION'] - expected['INVERSION']) < 1e-12, \
+                (size, tick, 'INVERSION')
+
+        legacy = timeit.timeit(
+            lambda: legacy_indicators((prices_dict, 0), average_dict,
+                                      latest_dict, strategy_queue, 0, 1),
+            number=REPEAT) / REPEAT
+        kernel = timeit.timeit(
+            lambda: market_indicators(prices, averages, latest, changes,
+                                      history, 0, 1),
+            number=REPEAT) / REPEAT
+
+        print(f'{size:>8} {legacy * 1e6:>12.1f} {kernel * 1e6:>12.1f} '
+              f'{legacy / kernel:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
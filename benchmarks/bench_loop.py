@@ -0,0 +1,207 @@
+"""
+Time every stage of Bot.step against a SimulatedClient on a virtual clock,
+counting the API requests each stage makes, over a sweep of bucket and
+snapshot queue sizes. The synthetic market swings enough for the bot to
+trade, and every run must trade, so the confirmation and order paths are
+timed too. Results are printed as a table and written as JSON so runs of
+different versions can be compared.
+
+Run from the repository root:
+    python -m benchmarks.bench_loop [--output loop.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from account import AccountState
+from bot import Bot
+from bucket import Bucket
+from configuration import STRATEGY_CONFIGURATION
+from exchange_info import ExchangeInfo
+from orders import OrderTracker
+from sim_client import ReplayFinished, SimulatedClient
+from strategies_avg_baselines import SNAPSHOT_REFRESH_RATE
+
+SIZES = [24, 100, 200, 500, 1000]
+QUEUE_SIZES = [30, 120, 480]
+STEPS = 200
+
+# Per-tick log-price volatility shared by every symbol and of each symbol on
+# its own: market-wide swings drive the rebound, confirmation and order paths
+# without the idiosyncratic 24hr moves that would suspend the whole bucket
+MARKET_VOLATILITY = 0.01
+SYMBOL_VOLATILITY = 0.002
+
+# Bot stages, nested calls (e.g. the trading loops refreshing prices) are
+# charged to the innermost stage
+BOT_STAGES = ['_strategize', '_pruning_loop', 'cooldown', '_fc_trading_loop',
+              '_cf_trading_loop', 'confirm', 'buy', 'sell', '_profit_retention',
+              '_snapshot_refresh', 'get_status']
+BUCKET_STAGES = ['get_prices', 'take_snapshot', 'ranking']
+
+
+class StageProfiler:
+    """Wrap methods of live objects to record their exclusive time and calls"""
+
+    def __init__(self, client: SimulatedClient):
+        self.client = client
+        self.time = defaultdict(float)
+        self.count = defaultdict(int)
+        self.api_calls = defaultdict(int)
+        self._stack = []
+
+    def instrument(self, obj, names):
+        for name in names:
+            setattr(obj, name, self._wrap(name, getattr(obj, name)))
+
+    def _wrap(self, name, method):
+        def wrapper(*args, **kwargs):
+            self._enter(name)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._exit()
+        return wrapper
+
+    def _mark(self):
+        return time.perf_counter(), sum(self.client.calls.values())
+
+    def _charge(self):
+        # Charge the innermost running stage up to now
+        name, since, calls_since = self._stack[-1]
+        now, calls = self._mark()
+        self.time[name] += now - since
+        self.api_calls[name] += calls - calls_since
+
+    def _enter(self, name):
+        if self._stack:
+            self._charge()
+        self.count[name] += 1
+        self._stack.append((name, *self._mark()))
+
+    def _exit(self):
+        self._charge()
+        self._stack.pop()
+        if self._stack:
+            name = self._stack[-1][0]
+            self._stack[-1] = (name, *self._mark())
+
+    def reset(self):
+        self.time.clear()
+        self.count.clear()
+        self.api_calls.clear()
+
+
+def market(pairs, ticks: int, interval: float, seed: int) -> SimulatedClient:
+    """Seeded random walk of a market factor plus each symbol's own moves"""
+    rng = np.random.default_rng(seed)
+    common = np.cumsum(rng.normal(0, MARKET_VOLATILITY, ticks))
+    own = np.cumsum(rng.normal(0, SYMBOL_VOLATILITY, (ticks, len(pairs))), axis=0)
+    prices = rng.uniform(1, 100, len(pairs)) * np.exp(common[:, None] + own)
+    return SimulatedClient(pairs, prices, timestamps=np.arange(ticks) * interval,
+                           interval=interval)
+
+
+def bench(size: int, queue_size: int, steps: int, seed: int = 0):
+    pairs = [f'S{i:04d}USDT' for i in range(size)]
+    # One snapshot per step, so the queue is full after queue_size steps
+    interval = SNAPSHOT_REFRESH_RATE + 1
+    client = market(pairs, queue_size + 20 * steps, interval, seed)
+    clock = client.clock
+
+    bucket = Bucket(pairs, queue_size, client=client, clock=clock)
+    bot = Bot(STRATEGY_CONFIGURATION, bucket, 'USDT',
+              account=AccountState(client, clock=clock),
+              exchange_info=ExchangeInfo(client, bucket.symbols, path=None,
+                                         clock=clock),
+              orders=OrderTracker(client, clock=clock),
+              client=client, clock=clock)
+
+    profiler = StageProfiler(client)
+    profiler.instrument(bot, BOT_STAGES)
+    profiler.instrument(bucket, BUCKET_STAGES)
+
+    # Fill the snapshot queue so the trading loops are reachable
+    for _ in range(queue_size):
+        bot.step()
+    profiler.reset()
+    client.reset_counters()
+    trades = len(client.trades)
+
+    done = 0
+    ticks = client.cursor
+    start = time.perf_counter()
+    try:
+        for done in range(1, steps + 1):
+            bot.step()
+    except ReplayFinished:
+        done -= 1
+    elapsed = time.perf_counter() - start
+
+    # Without trades the order paths only measure their entry checks
+    trades = len(client.trades) - trades
+    assert trades > 0, f'no trades with {size} symbols and a {queue_size} ' \
+                       f'snapshot queue, the order paths went unmeasured'
+
+    return {
+        'symbols': size,
+        'snapshot_queue_size': queue_size,
+        'steps': done,
+        'ticks': client.cursor - ticks,
+        'trades': trades,
+        'step_seconds': elapsed / max(done, 1),
+        'stages': {name: {'calls': profiler.count[name],
+                          'seconds': profiler.time[name] / max(done, 1),
+                          'api_calls': profiler.api_calls[name] / max(done, 1)}
+                   for name in BUCKET_STAGES + BOT_STAGES
+                   if profiler.count[name]},
+        'api_calls': {name: count / max(done, 1)
+                      for name, count in sorted(client.calls.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--queue-sizes', type=int, nargs='+',
+                        default=QUEUE_SIZES)
+    parser.add_argument('--steps', type=int, default=STEPS)
+    parser.add_argument('--output', help='write the JSON results here')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"symbols":>8} {"queue":>6} {"step (us)":>10}  '
+          f'slowest stages (us/step, api calls/step)')
+    for size in args.sizes:
+        for queue_size in args.queue_sizes:
+            with open(os.devnull, 'w') as devnull, \
+                    contextlib.redirect_stdout(devnull):
+                result = bench(size, queue_size, args.steps)
+            results.append(result)
+
+            stages = sorted(result['stages'].items(),
+                            key=lambda item: -item[1]['seconds'])[:3]
+            summary = ', '.join(
+                f'{name} {stage["seconds"] * 1e6:.0f} ({stage["api_calls"]:.2f})'
+                for name, stage in stages)
+            print(f'{size:>8} {queue_size:>6} '
+                  f'{result["step_seconds"] * 1e6:>10.0f}  {summary}')
+
+    report = {'python': platform.python_version(), 'numpy': np.__version__,
+              'machine': platform.machine(), 'steps': args.steps,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
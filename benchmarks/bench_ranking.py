@@ -0,0 +1,105 @@
+"""
+Compare the vectorized Ranking against the original max_fall / max_rise loops.
+
+Run from the repository root:
+    python -m benchmarks.bench_ranking
+"""
+import random
+import timeit
+
+import numpy as np
+
+from ranking import Ranking
+
+SIZES = [24, 200, 1000]
+REPEAT = 200
+
+
+def legacy_max_fall(lst, prices, average_snapshot):
+    symbol = lst[0][:-4]
+    price = prices[0][symbol][0]
+    snapshot = average_snapshot[0][symbol][0]
+    max_ = (price - snapshot) / snapshot * 100
+
+    for i in range(1, len(lst)):
+        symbol_new = lst[i][:-4]
+        price_new = prices[0][symbol_new][0]
+        snapshot_new = average_snapshot[0][symbol_new][0]
+        max_new = (price_new - snapshot_new) / snapshot_new * 100
+        if max_new < max_:
+            max_ = max_new
+            symbol = symbol_new
+    return symbol, max_
+
+
+def legacy_max_rise(lst, prices, average_snapshot):
+    symbol = lst[0][:-4]
+    price = prices[0][symbol][0]
+    snapshot = average_snapshot[0][symbol][0]
+    max_ = (price - snapshot) / snapshot * 100
+
+    for i in range(1, len(lst)):
+        symbol_new = lst[i][:-4]
+        price_new = prices[0][symbol_new][0]
+        snapshot_new = average_snapshot[0][symbol_new][0]
+        max_new = (price_new - snapshot_new) / snapshot_new * 100
+        if max_new > max_:
+            max_ = max_new
+            symbol = symbol_new
+    return symbol, max_
+
+
+def market(size: int):
+    rng = random.Random(size)
+    lst = [f'C{i}USDT' for i in range(size)]
+    average = {pair[:-4]: (rng.uniform(1, 1000), 0.0) for pair in lst}
+    prices = {coin: (value * rng.uniform(0.9, 1.1), 0.0)
+              for coin, (value, _) in average.items()}
+    return lst, (prices, 0.0), (average, 0.0)
+
+
+def vectorized(lst, prices, average_snapshot):
+    symbols = [pair[:-4] for pair in lst]
+    return Ranking(symbols,
+                   np.array([prices[0][symbol][0] for symbol in symbols]),
+                   np.array([average_snapshot[0][symbol][0]
+                             for symbol in symbols]))
+
+
+def main():
+    print(f'{"symbols":>8} {"legacy (us)":>12} {"ranking (us)":>13} '
+          f'{"kernel (us)":>12} {"speedup":>8}')
+    for size in SIZES:
+        lst, prices, average_snapshot = market(size)
+
+        ranking = vectorized(lst, prices, average_snapshot)
+        assert ranking.max_fall() == legacy_max_fall(lst, prices, average_snapshot)
+        assert ranking.max_rise() == legacy_max_rise(lst, prices, average_snapshot)
+
+        legacy = timeit.timeit(
+            lambda: (legacy_max_fall(lst, prices, average_snapshot),
+                     legacy_max_rise(lst, prices, average_snapshot)),
+            number=REPEAT) / REPEAT
+
+        # Bucket builds the vectors once per tick, then ranks from arrays
+        price_vector = np.array([prices[0][s][0] for s in ranking.symbols])
+        average_vector = np.array([average_snapshot[0][s][0]
+                                   for s in ranking.symbols])
+
+        def rank_kernel():
+            r = Ranking(ranking.symbols, price_vector, average_vector)
+            return r.max_fall(), r.max_rise()
+
+        def rank_full():
+            r = vectorized(lst, prices, average_snapshot)
+            return r.max_fall(), r.max_rise()
+
+        kernel = timeit.timeit(rank_kernel, number=REPEAT) / REPEAT
+        full = timeit.timeit(rank_full, number=REPEAT) / REPEAT
+
+        print(f'{size:>8} {legacy * 1e6:>12.1f} {full * 1e6:>13.1f} '
+              f'{kernel * 1e6:>12.1f} {legacy / kernel:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
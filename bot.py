@@ -1,22 +1,50 @@
-import time
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from strategy import *
 from bucket import Bucket
 from customized_behaviour import customized_behaviour
 from strategies_avg_baselines import SNAPSHOT_QUEUE_SIZE, SNAPSHOT_REFRESH_RATE
+from account import AccountState
+from exchange_info import ExchangeInfo
+from orders import Fill, OrderTracker
+from indicators import IndicatorHistory, market_indicators
+from clock import wall_clock
+from warm_start import snapshots
+
+from concurrent.futures import TimeoutError
 
 import math
 
-from api import client
+import api
 
 
 class Bot:
     def __init__(self, strategy_configuration, bucket: Bucket,
-                 initial_holding: str, initial_value=None):
+                 initial_holding: str, initial_value=None,
+                 account: AccountState = None,
+                 exchange_info: ExchangeInfo = None,
+                 orders: OrderTracker = None, order_timeout: float = 30,
+                 client=None, clock=wall_clock, history=None):
+
+        # Exchange and time source, see backtest.py for simulated ones
+        self.client = client if client is not None else api.client
+        self.clock = clock
 
         # Bucket Initialization
         self.bucket = bucket
 
+        # Account Initialization
+        self.account = account if account is not None \
+            else AccountState(self.client)
+        self.exchange_info = exchange_info if exchange_info is not None \
+            else ExchangeInfo(self.client, bucket.symbols)
+
+        # Order Tracking Initialization
+        self.orders = orders if orders is not None \
+            else OrderTracker(self.client)
+        self.order_timeout = order_timeout
+        # (future, order, holding) of an order still pending after the timeout
+        self.pending_order = None
+
         # Strategy Initialization
         self.strategy_baselines = strategy_configuration['BASELINE']
         self.strategy_multipliers_24hr = strategy_configuration['24HR']
@@ -30,26 +58,25 @@ class Bot:
         self.strategy_multiplier_inversion = \
         strategy_configuration['INVERSION'][0]
 
-        self.strategy = Strategy(self.strategy_baseline,
-                                 self.strategy_multiplier_24hr,
-                                 self.strategy_multiplier_latest,
-                                 self.strategy_multiplier_inversion)
+        # Composite strategies are precomputed, switching is an index update
+        self.strategy_table = StrategyTable(strategy_configuration)
+        self.strategy_index = [0, 0, 0, 0]
+        self.strategy = self.strategy_table[self.strategy_index]
         self.strategy_indicator = {'BASELINE': 0.0, '24HR': 0.0, 'LATEST': 0.0,
                                    'INVERSION': 0.0}
 
-        self.strategy_queue = []
+        self.strategy_queue = IndicatorHistory(SNAPSHOT_QUEUE_SIZE)
 
         # Portfolio and Market Initialization
         self.current_holding = initial_holding
         if initial_holding != 'USDT':
             price = float(
-                client.get_symbol_ticker(symbol=initial_holding + 'USDT')[
+                self.client.get_symbol_ticker(symbol=initial_holding + 'USDT')[
                     'price'])
         else:
             price = 1
 
-        initial_balance = float(
-            client.get_asset_balance(asset=initial_holding)['free'])
+        initial_balance = self.account.free(initial_holding)
 
         self.initial_value = initial_balance * price
         print(f'Trading started with {initial_balance} {initial_holding}'
@@ -57,6 +84,10 @@ class Bot:
         if initial_value is not None:
             self.initial_value = initial_value
 
+        # Market history, see warm_start.py, saves waiting for the queues
+        if history is not None:
+            self.warm_start(history)
+
         self.bucket.take_snapshot()
         print('Price snapshot enqueued')
 
@@ -65,51 +96,63 @@ class Bot:
         self.profit_delta = None
         self.priming = False
 
-        self.last_trade_time = time.time()
+        self.last_trade_time = self.clock.time()
 
         # Trading loop varaibles
         self.rebound_price_snapshot = None
-        self.last_sell_time = time.time()
+        # A warm start trades right away, there is no sell to cool down from
+        self.last_sell_time = self.clock.time() if history is None \
+            else -math.inf
 
     def run(self):
         try:
             exit_ = False
             while not exit_:
-                self.bucket.prices = self.bucket.get_prices()
+                exit_ = self.step()
 
-                # Analyze market and mutate strategy
-                self._strategize()
+        except Exception as e:
+            print(f'Exception raised'
+                  f'\n{e}'
+                  f'\nRestarting...')
+            self.run()
 
-                # Bucket pruning logic and loop
-                self._pruning_loop()
+    def step(self) -> bool:
+        """Run one iteration of the trading loop, return whether to exit"""
+        # Start a new tick, shared by every stage of this iteration
+        self.bucket.refresh(0)
 
-                if not self.cooldown():
+        # Switch holding once an order left pending has filled
+        pending = self._settle_order()
 
-                    customized_behaviour()
+        # Analyze market and mutate strategy
+        self._strategize()
 
-                    if self.current_holding == 'USDT':
-                        # Fiat-Crypto trading activation logic and loop
-                        self._fc_trading_loop()
-                    else:
-                        # Crypto-Fiat trading activation logic and loop
-                        self._cf_trading_loop()
+        # Bucket pruning logic and loop
+        self._pruning_loop()
 
-                # Check exit strategy
-                exit_ = self._exit()
+        if not pending and not self.cooldown():
 
-                # Profit retention mechanism
-                self._profit_retention()
+            customized_behaviour()
 
-                # Price and profit snapshot refresh
-                self._snapshot_refresh()
+            if self.current_holding == 'USDT':
+                # Fiat-Crypto trading activation logic and loop
+                self._fc_trading_loop()
+            else:
+                # Crypto-Fiat trading activation logic and loop
+                self._cf_trading_loop()
 
-                print(self.get_status())
+        # Check exit strategy
+        exit_ = self._exit()
 
-        except Exception as e:
-            print(f'Exception raised'
-                  f'\n{e}'
-                  f'\nRestarting...')
-            self.run()
+        # Profit retention mechanism
+        self._profit_retention()
+
+        # Price and profit snapshot refresh
+        self._snapshot_refresh()
+
+        print(self.get_status())
+
+        return exit_
 
     # Helpers
     ################################################################################
@@ -118,19 +161,19 @@ class Bot:
         """
         Return price as a float of given symbol.
         """
-        return self.bucket.prices[0][symbol][0]
+        return float(self.bucket.prices.vector[self.bucket.symbols.id(symbol), 0])
 
     def get_24hr_change(self, symbol: str) -> float:
         """
         Return 24Hr change as a float of given symbol.
         """
-        return self.bucket.prices[0][symbol][1]
+        return float(self.bucket.prices.vector[self.bucket.symbols.id(symbol), 1])
 
     def get_status(self) -> str:
         balance = self.get_balance()
 
         if self.current_holding != 'USDT':
-            self.bucket.prices = self.bucket.get_prices()
+            self.bucket.refresh()
             price = self.get_price(self.current_holding)
             s = f'Current balance: ' \
                 f'{balance} {self.current_holding}' \
@@ -151,136 +194,101 @@ class Bot:
 
     def _strategize(self) -> bool:
 
-        cardinality = len(self.bucket.prices[0])
-        sum_avg = 0
-        sum_24hr = 0
-        sum_latest = 0
-
-        latest_baseline = {}
-        for coin in self.bucket.snapshot_queue[0][0]:
-            lst_snapshot = []
-            for i in range(min(self.strategy.latest_snapshot_count,
-                               len(self.bucket.snapshot_queue))):
-                lst_snapshot.append(
-                    self.bucket.snapshot_queue[-(i + 1)][0][coin][0])
-            avg_snapshot = sum(lst_snapshot) / len(lst_snapshot)
-
-            latest_baseline[coin] = avg_snapshot
-
-        for coin in self.bucket.prices[0]:
-
-            current_price = self.get_price(coin)
-            if current_price > self.bucket.average_snapshot[0][coin][0]:
-                sum_avg += 1
-            if current_price > latest_baseline[coin]:
-                sum_latest += 1
-            if self.get_24hr_change(coin) > 0:
-                sum_24hr += 1
-
-        self.strategy_indicator['BASELINE'] = sum_avg / cardinality
-        self.strategy_indicator['24HR'] = sum_24hr / cardinality
-        self.strategy_indicator['LATEST'] = sum_latest / cardinality
-
-        if (not self.strategy_queue) or time.time() - self.strategy_queue[-1][
-            -1] > SNAPSHOT_REFRESH_RATE:
-            self.strategy_queue.append(
-                (self.strategy_indicator['BASELINE'], time.time()))
-            if len(self.strategy_queue) > SNAPSHOT_QUEUE_SIZE:
-                self.strategy_queue.pop(0)
-
-        inversion_indicator = self.strategy_indicator['BASELINE'] - \
-                              sum(i for i, j in self.strategy_queue) / len(
-            self.strategy_queue)
-
-        self.strategy_indicator['INVERSION'] = inversion_indicator
+        prices = self.bucket.prices.vector
+        indicators = market_indicators(
+            prices[:, 0], self.bucket.average_vector,
+            self.bucket.snapshot_queue.latest_average(
+                self.strategy.latest_snapshot_count),
+            prices[:, 1], self.strategy_queue, self.clock.time(),
+            SNAPSHOT_REFRESH_RATE)
 
-        switched = False
-
-        for baseline in self.strategy_baselines:
-            if cardinality * baseline.interval[0] <= \
-                    sum_avg <= \
-                    cardinality * baseline.interval[1]:
-
-                if self.strategy_baseline.name != baseline.name:
-                    print(
-                        f'Switching strategy baseline: {self.strategy_baseline.name} -> {baseline.name}')
-                    switched |= True
-                    self.strategy_baseline = baseline
-                break
+        cardinality = indicators.cardinality
+        sum_avg = indicators.above_average
+        sum_24hr = indicators.positive_24hr
+        sum_latest = indicators.above_latest
+        inversion_indicator = indicators.inversion
 
-        for m24hr in self.strategy_multipliers_24hr:
-            if cardinality * m24hr.interval[0] <= \
-                    sum_24hr <= \
-                    cardinality * m24hr.interval[1]:
+        self.strategy_indicator = indicators.as_dict()
 
-                if self.strategy_multiplier_24hr.name != m24hr.name:
-                    print(
-                        f'Switching 24Hr strategy multiplier: {self.strategy_multiplier_24hr.name} -> {m24hr.name}')
-                    switched |= True
-                    self.strategy_multiplier_24hr = m24hr
-                break
+        switched = False
 
-        for mlatest in self.strategy_multipliers_latest:
-            if cardinality * mlatest.interval[0] <= \
-                    sum_latest <= \
-                    cardinality * mlatest.interval[1]:
+        selectors = self.strategy_table.selectors
 
-                if self.strategy_multiplier_latest.name != mlatest.name:
-                    print(
-                        f'Switching latest strategy multiplier: {self.strategy_multiplier_latest.name} -> {mlatest.name}')
-                    switched |= True
-                    self.strategy_multiplier_latest = mlatest
-                break
-
-        for inversion in self.strategy_multipliers_inversion:
-            if inversion.interval[0] <= inversion_indicator <= \
-                    inversion.interval[1]:
-                if self.strategy_multiplier_inversion.name != inversion.name:
-                    print(
-                        f'Switching inversion multiplier: {self.strategy_multiplier_inversion.name} -> {inversion.name}')
-                    switched |= True
-                    self.strategy_multiplier_inversion = inversion
-                break
+        i = selectors['BASELINE'].select(sum_avg, cardinality)
+        if i is not None:
+            baseline = self.strategy_baselines[i]
+            if self.strategy_baseline.name != baseline.name:
+                print(
+                    f'Switching strategy baseline: {self.strategy_baseline.name} -> {baseline.name}')
+                switched |= True
+                self.strategy_baseline = baseline
+                self.strategy_index[0] = i
+
+        i = selectors['24HR'].select(sum_24hr, cardinality)
+        if i is not None:
+            m24hr = self.strategy_multipliers_24hr[i]
+            if self.strategy_multiplier_24hr.name != m24hr.name:
+                print(
+                    f'Switching 24Hr strategy multiplier: {self.strategy_multiplier_24hr.name} -> {m24hr.name}')
+                switched |= True
+                self.strategy_multiplier_24hr = m24hr
+                self.strategy_index[1] = i
+
+        i = selectors['LATEST'].select(sum_latest, cardinality)
+        if i is not None:
+            mlatest = self.strategy_multipliers_latest[i]
+            if self.strategy_multiplier_latest.name != mlatest.name:
+                print(
+                    f'Switching latest strategy multiplier: {self.strategy_multiplier_latest.name} -> {mlatest.name}')
+                switched |= True
+                self.strategy_multiplier_latest = mlatest
+                self.strategy_index[2] = i
+
+        i = selectors['INVERSION'].select(inversion_indicator)
+        if i is not None:
+            inversion = self.strategy_multipliers_inversion[i]
+            if self.strategy_multiplier_inversion.name != inversion.name:
+                print(
+                    f'Switching inversion multiplier: {self.strategy_multiplier_inversion.name} -> {inversion.name}')
+                switched |= True
+                self.strategy_multiplier_inversion = inversion
+                self.strategy_index[3] = i
 
         if switched:
-            self.strategy = Strategy(self.strategy_baseline,
-                                     self.strategy_multiplier_24hr,
-                                     self.strategy_multiplier_latest,
-                                     self.strategy_multiplier_inversion)
+            self.strategy = self.strategy_table[self.strategy_index]
 
         return switched
 
     def _pruning_loop(self):
         if self.bucket.lst:
             avg = self.bucket.get_24hr_avg_delta()
-            for pair in self.bucket.lst:
-                diff = self.bucket.prices[0][pair[:-4]][1] - avg
+            for symbol in list(self.bucket.lst):
+                diff = self.bucket.prices.vector[symbol, 1] - avg
                 if abs(diff) > self.strategy.suspension_threshold:
-                    self.bucket.suspend(pair[:-4])
+                    self.bucket.suspend(symbol)
+                    coin = self.bucket.symbols.base(symbol)
                     print(
-                        f'Suspension threshold exceeded for {pair[:-4]} @{diff}% above 24hr average'
-                        f'\n{pair[:-4]} suspended from trading for {self.strategy.suspension_time}s')
+                        f'Suspension threshold exceeded for {coin} @{diff}% above 24hr average'
+                        f'\n{coin} suspended from trading for {self.strategy.suspension_time}s')
 
             # Unsuspend time
-            if self.bucket.suspension_queue and time.time() - \
-                    self.bucket.suspension_queue[0][
-                        1] > self.strategy.suspension_time:
-                self.bucket.unsuspend()
+            for symbol in self.bucket.release_expired(
+                    self.strategy.suspension_time):
+                coin = self.bucket.symbols.base(symbol)
                 print(
-                    f'Suspension time reached for {self.bucket.suspension_queue[0][0][:-4]}'
-                    f'\n{self.bucket.suspension_queue[0][0][:-4]} now unsuspended from trading')
+                    f'Suspension time reached for {coin}'
+                    f'\n{coin} now unsuspended from trading')
 
         else:
             print('Bucket is empty, resetting suspension queue...')
-            while self.bucket.suspension_queue:
-                self.bucket.unsuspend()
+            self.bucket.release_all()
 
     def _fc_trading_loop(self):
         bucket_delta = self.bucket.max_fall()
+        target = self.bucket.symbols.id(bucket_delta[0])
 
-        target_price = self.get_price(bucket_delta[0])
-        target_price_snapshot = \
-        self.bucket.average_snapshot[0][bucket_delta[0]][0]
+        target_price = float(self.bucket.prices.vector[target, 0])
+        target_price_snapshot = float(self.bucket.average_vector[target])
 
         target_delta = 100 * (
                 target_price - target_price_snapshot) / target_price_snapshot
@@ -298,25 +306,27 @@ class Bot:
                 f'Fiat-Crypto delta threshold exceeded for {bucket_delta[0]}\n'
                 f'Waiting for rebound...')
 
-            start_time = time.time()
-            t_delta = time.time() - start_time
+            start_time = self.clock.time()
+            t_delta = self.clock.time() - start_time
             traded = False
             aborted = False
-            self.rebound_price_snapshot = self.bucket.average_snapshot
+            # Replaced, never updated in place, on every snapshot
+            self.rebound_price_snapshot = self.bucket.average_vector
 
             while t_delta < self.strategy.rebound_wait_time:
 
+                self.bucket.refresh(0)
+
                 self._snapshot_refresh()
 
                 switched = self._strategize()
 
                 bucket_delta_new = self.bucket.max_fall()
-                target_price_snapshot = self.rebound_price_snapshot[0][
-                    bucket_delta_new[0]][0]
-                self.bucket.prices = self.bucket.get_prices()
+                target = self.bucket.symbols.id(bucket_delta_new[0])
+                target_price_snapshot = float(self.rebound_price_snapshot[target])
 
-                t_delta = time.time() - start_time
-                new_price = self.get_price(bucket_delta_new[0])
+                t_delta = self.clock.time() - start_time
+                new_price = float(self.bucket.prices.vector[target, 0])
                 new_target_delta = (
                                                new_price - target_price_snapshot) / target_price_snapshot * 100
 
@@ -347,13 +357,8 @@ class Bot:
 
                         bucket_delta_new = self.bucket.max_fall()
 
-                        self.buy(bucket_delta_new[0])
-                        self.last_trade_time = time.time()
-                        self.current_holding = bucket_delta_new[0]
-                        self.bucket.take_snapshot()
-                        print('Price snapshot enqueued')
-                        self.profit_snapshot = self.current_profit()
-                        print('Profit snapshot taken')
+                        self._hold(bucket_delta_new[0],
+                                   self.buy(bucket_delta_new[0]))
                         traded = True
                         break
 
@@ -367,20 +372,15 @@ class Bot:
                     f'    Waiting time exceeded for {bucket_delta_new[0]}\n'
                     f'    Trading...')
 
-                self.buy(bucket_delta_new[0])
-                self.last_trade_time = time.time()
-                self.bucket.take_snapshot()
-                print('Price snapshot enqueued')
-                self.profit_snapshot = self.current_profit()
-                print('Profit snapshot taken')
+                self._hold(bucket_delta_new[0], self.buy(bucket_delta_new[0]))
 
     def _fc_confirmation_logic(self, target_delta):
 
         bucket_delta_new = self.bucket.max_fall()
-        target_price_snapshot = self.rebound_price_snapshot[0][
-            bucket_delta_new[0]][0]
+        target = self.bucket.symbols.id(bucket_delta_new[0])
+        target_price_snapshot = float(self.rebound_price_snapshot[target])
 
-        new_price = self.get_price(bucket_delta_new[0])
+        new_price = float(self.bucket.prices.vector[target, 0])
         new_target_delta = (
                                        new_price - target_price_snapshot) / target_price_snapshot * 100
 
@@ -389,9 +389,9 @@ class Bot:
         return rebound_ratio > self.strategy.fc_rebound_ratio
 
     def _cf_trading_loop(self):
-        holding_price = self.bucket.prices[0][self.current_holding][0]
-        snapshot_price = self.bucket.average_snapshot[0][self.current_holding][
-            0]
+        holding = self.bucket.symbols.id(self.current_holding)
+        holding_price = float(self.bucket.prices.vector[holding, 0])
+        snapshot_price = float(self.bucket.average_vector[holding])
 
         price_delta = 100 * (holding_price - snapshot_price) / snapshot_price
         print(f'[Crypto-Fiat] delta = {price_delta}% with USDT (latest price '
@@ -403,21 +403,22 @@ class Bot:
                 f'Crypto-Fiat delta threshold exceeded for USDT\n'
                 f'Waiting for rebound...')
 
-            start_time = time.time()
-            t_delta = time.time() - start_time
+            start_time = self.clock.time()
+            t_delta = self.clock.time() - start_time
             traded = False
             aborted = False
 
             while t_delta < self.strategy.rebound_wait_time:
 
+                self.bucket.refresh(0)
+
                 self._snapshot_refresh()
 
-                t_delta = time.time() - start_time
+                t_delta = self.clock.time() - start_time
 
                 switched = self._strategize()
-                self.bucket.prices = self.bucket.get_prices()
 
-                new_price = self.get_price(self.current_holding)
+                new_price = float(self.bucket.prices.vector[holding, 0])
                 new_price_delta = (
                                           new_price - snapshot_price) / snapshot_price * 100
 
@@ -446,16 +447,8 @@ class Bot:
 
                         print('Trading...')
 
-                        self.sell(self.current_holding)
-                        self.last_trade_time = time.time()
-                        self.current_holding = 'USDT'
-                        self.bucket.take_snapshot()
-                        print('Price snapshot enqueued')
-                        self.profit_snapshot = self.current_profit()
-                        print('Profit snapshot taken')
+                        self._hold('USDT', self.sell(self.current_holding))
                         traded = True
-                        self.priming = False
-                        self.profit_delta = None
                         break
 
                 if rebound_ratio < 0:
@@ -466,35 +459,26 @@ class Bot:
                     break
 
             if (not aborted) and (not traded):
-                bucket_delta_new = self.bucket.max_fall()
-
                 print(
                     f'    Waiting time exceeded\n'
                     f'    Trading...')
 
-                self.sell(bucket_delta_new[0])
-                self.last_trade_time = time.time()
-                self.bucket.take_snapshot()
-                print('Price snapshot enqueued')
-                self.profit_snapshot = self.current_profit()
-                print('Profit snapshot taken')
-                self.priming = False
-                self.profit_delta = None
+                self._hold('USDT', self.sell(self.current_holding))
 
     def _cf_confirmation_logic(self, price_delta):
 
-        snapshot_price = self.bucket.average_snapshot[0][self.current_holding][
-            0]
+        holding = self.bucket.symbols.id(self.current_holding)
+        snapshot_price = float(self.bucket.average_vector[holding])
 
-        new_price = self.get_price(self.current_holding)
+        new_price = float(self.bucket.prices.vector[holding, 0])
         new_price_delta = (new_price - snapshot_price) / snapshot_price * 100
         rebound_ratio = (price_delta - new_price_delta) / price_delta
 
         return rebound_ratio > self.strategy.cf_rebound_ratio
 
     def _snapshot_refresh(self):
-        if time.time() - self.bucket.average_snapshot[
-            1] > self.strategy.snapshot_refresh_rate:
+        if self.clock.time() - self.bucket.snapshot_queue.latest_timestamp > \
+                self.strategy.snapshot_refresh_rate:
             self.bucket.take_snapshot()
             print(
                 f'Snapshot refresh time of {self.strategy.snapshot_refresh_rate}s has elapsed since last saved snapshot, new price snapshot enqueued')
@@ -502,7 +486,7 @@ class Bot:
     def _profit_retention(self) -> bool:
         triggered = False
 
-        if self.current_holding != 'USDT':
+        if self.current_holding != 'USDT' and self.pending_order is None:
             if self.profit_delta is None:
                 self.profit_delta = self.current_profit() - self.profit_snapshot
             else:
@@ -541,16 +525,7 @@ class Bot:
                         print('Trading...')
                         triggered = True
 
-                        self.sell(self.current_holding)
-                        self.last_trade_time = time.time()
-                        self.current_holding = 'USDT'
-                        self.bucket.take_snapshot()
-                        print('Price snapshot enqueued')
-                        self.profit_snapshot = self.current_profit()
-                        print('Profit snapshot taken')
-                        self.priming = False
-
-                        self.profit_delta = None
+                        self._hold('USDT', self.sell(self.current_holding))
 
         return triggered
 
@@ -572,15 +547,21 @@ class Bot:
         return trigger
 
     def confirm(self, logic, parameter, repetition, delay):
-        self.bucket.prices = self.bucket.get_prices()
-        prices = self.bucket.prices
+        """
+        Check logic up to repetition times, one round every delay seconds on a
+        monotonic timer. Each round is evaluated against the freshest market
+        snapshot, fetching a new tick only when the cached one predates the
+        previous round.
+        """
+        self.bucket.refresh()
+        next_round = self.clock.monotonic()
 
         for i in range(repetition):
             if logic(parameter):
                 print(f'Confirmation {i} successful')
-                self.bucket.prices = self.bucket.get_prices()
-                while self.bucket.prices[1] - prices[1] < delay:
-                    self.bucket.prices = self.bucket.get_prices()
+                next_round += delay
+                self.clock.sleep(max(next_round - self.clock.monotonic(), 0))
+                self.bucket.refresh(delay)
             else:
                 print(f'Confirmation {i} failed')
                 return False
@@ -589,13 +570,32 @@ class Bot:
     def _exit(self) -> bool:
         return False
 
+    def warm_start(self, history):
+        """
+        Enqueue the (pairs, timestamps, prices, changes) history's prices at
+        every SNAPSHOT_REFRESH_RATE before now as snapshots, updating the
+        strategy queue as _strategize would have, so the cooldown does not
+        wait for the snapshot queue to fill live. Slots the history has no
+        recent tick for are left to fill live.
+        """
+        vectors, timestamps = snapshots(
+            self.bucket.symbols.pairs, history, self.clock.time(),
+            self.bucket.snapshot_queue_size - 1, SNAPSHOT_REFRESH_RATE)
+        for vector, timestamp in zip(vectors, timestamps):
+            self.bucket.push_snapshot(vector, timestamp)
+            # One entry per snapshot, as live steps push about once per rate
+            market_indicators(vector[:, 0], self.bucket.average_vector,
+                              self.bucket.average_vector, vector[:, 1],
+                              self.strategy_queue, timestamp, 0)
+        print(f'{len(timestamps)} price snapshots backfilled from history')
+
     def cooldown(self) -> bool:
         if len(self.bucket.snapshot_queue) < self.bucket.snapshot_queue_size:
             suspend = True
-            time_anchor = self.bucket.snapshot_queue[0][-1]
+            time_anchor = self.bucket.snapshot_queue.oldest_timestamp
             time_span = (
                                     self.bucket.snapshot_queue_size - 1) * self.strategy.snapshot_refresh_rate
-        elif time.time() - self.last_sell_time < self.strategy.trading_cooldown_time:
+        elif self.clock.time() - self.last_sell_time < self.strategy.trading_cooldown_time:
             suspend = True
             time_anchor = self.last_sell_time
             time_span = self.strategy.trading_cooldown_time
@@ -606,19 +606,17 @@ class Bot:
 
         if suspend:
             print(
-                f'==== Cooldown in effect, trading suspended. {time_span - (time.time() - time_anchor)} seconds until resumption ====')
+                f'==== Cooldown in effect, trading suspended. {time_span - (self.clock.time() - time_anchor)} seconds until resumption ====')
 
         return suspend
 
     # Interfacing Methods
     ############################################################################
     def get_balance(self) -> float:
-        return float(
-            client.get_asset_balance(asset=self.current_holding)['free'])
+        return self.account.free(self.current_holding)
 
     def current_profit(self) -> float:
-        balance = float(
-            client.get_asset_balance(asset=self.current_holding)['free'])
+        balance = self.account.free(self.current_holding)
         if self.current_holding != 'USDT':
             price = self.get_price(self.current_holding)
             return float(price) * balance - self.initial_value
@@ -626,65 +624,122 @@ class Bot:
             return balance - self.initial_value
 
     def current_balance(self) -> float:
-        balance = float(
-            client.get_asset_balance(asset=self.current_holding)['free'])
+        balance = self.account.free(self.current_holding)
         if self.current_holding != 'USDT':
             price = self.get_price(self.current_holding)
             return float(price) * balance
         else:
             return balance
 
-    def buy(self, coin: str):
+    def buy(self, coin: str) -> Optional[Fill]:
         try:
 
-            balance = float(client.get_asset_balance(asset='USDT')['free'])
+            balance = self.account.free('USDT')
 
-            tick = None
-
-            for filt in client.get_symbol_info(coin + 'USDT')['filters']:
-                if filt['filterType'] == 'LOT_SIZE':
-                    tick = filt['stepSize'].find('1') - 2
-                    break
+            tick = self.exchange_info.get(
+                self.bucket.symbols.id(coin)).lot_precision
 
             price = float(
-                client.get_symbol_ticker(symbol=coin + 'USDT')['price'])
+                self.client.get_symbol_ticker(symbol=coin + 'USDT')['price'])
             target = balance / price
             order_quantity = math.floor(target * 10 ** tick) / float(10 ** tick)
 
-            order = client.order_market_buy(
+            order = self.client.order_market_buy(
                 symbol=coin + 'USDT',
                 quantity=order_quantity)
 
-            while order['status'] != 'FILLED':
-                print('    Pending order fulfillment...')
-                time.sleep(0.5)
+            fill = self._confirm_order(order, coin)
 
-            self.last_trade_time = time.time()
-            print('    Order successful')
+            self.account.reconcile()
+            self.last_trade_time = self.clock.time()
+            return fill
 
         except:
             print('    Exception detected, re-attemtpting order')
-            self.buy(coin)
+            return self.buy(coin)
 
-    def sell(self, coin: str):
-        balance = float(client.get_asset_balance(asset=coin)['free'])
+    def sell(self, coin: str) -> Optional[Fill]:
+        balance = self.account.free(coin)
 
-        tick = None
-
-        for filt in client.get_symbol_info(coin + 'USDT')['filters']:
-            if filt['filterType'] == 'LOT_SIZE':
-                tick = filt['stepSize'].find('1') - 2
-                break
+        tick = self.exchange_info.get(self.bucket.symbols.id(coin)).lot_precision
 
         order_quantity = math.floor(balance * 10 ** tick) / float(10 ** tick)
-        order = client.order_market_sell(
+        order = self.client.order_market_sell(
             symbol=coin + 'USDT',
             quantity=order_quantity)
 
-        while order['status'] != 'FILLED':
-            print('    Pending order fulfillment...')
-            time.sleep(0.5)
+        fill = self._confirm_order(order, 'USDT')
+
+        self.account.reconcile()
+        self.last_trade_time = self.clock.time()
+        self.last_sell_time = self.clock.time()
+        return fill
 
-        self.last_trade_time = time.time()
-        self.last_sell_time = time.time()
-        print('    Order successful')
+    def _confirm_order(self, order, holding: str) -> Optional[Fill]:
+        """
+        Wait at most order_timeout for the order trading into holding to reach
+        a terminal state and return its Fill if it filled, see _filled. Orders
+        still pending are left to the tracker and None is returned.
+        """
+        future = self.orders.track(order)
+        try:
+            fill = future.result(timeout=self.order_timeout)
+        except TimeoutError:
+            print('    Order still pending, tracking in background')
+            self.pending_order = future, order, holding
+            return None
+
+        if fill.status != 'FILLED' and fill.quantity == 0:
+            raise Exception(f'Order {order["orderId"]} {fill.status.lower()}')
+        return self._filled(order, fill)
+
+    @staticmethod
+    def _filled(order, fill: Fill) -> Optional[Fill]:
+        """
+        Return fill if the order filled in full or for the most part, so the
+        bot's holding follows the asset holding most of its value.
+        """
+        print(f'    Order {fill.status.lower()}: {fill.quantity} @{fill.price}'
+              f'  (commission {fill.commission} {fill.commission_asset})')
+        if fill.status == 'FILLED' or \
+                fill.quantity >= float(order['origQty']) / 2:
+            return fill
+        print(f'    Only {fill.quantity} of {order["origQty"]} filled, '
+              f'holding unchanged')
+        return None
+
+    def _hold(self, holding: str, fill: Optional[Fill]):
+        """
+        Switch to holding after the order trading into it has filled. Without
+        a fill the holding is unchanged, an order still pending switches it
+        from _settle_order once it fills.
+        """
+        if fill is None:
+            return
+
+        self.last_trade_time = self.clock.time()
+        self.current_holding = holding
+        self.bucket.take_snapshot()
+        print('Price snapshot enqueued')
+        self.profit_snapshot = self.current_profit()
+        print('Profit snapshot taken')
+        if holding == 'USDT':
+            self.priming = False
+            self.profit_delta = None
+
+    def _settle_order(self) -> bool:
+        """
+        Apply the order left pending by _confirm_order once it is terminal,
+        return whether it is still pending. No order is placed meanwhile.
+        """
+        if self.pending_order is None:
+            return False
+        future, order, holding = self.pending_order
+        if not future.done():
+            print(f'    Order {order["orderId"]} still pending, trading paused')
+            return True
+
+        self.pending_order = None
+        self.account.reconcile()
+        self._hold(holding, self._filled(order, future.result()))
+        return False
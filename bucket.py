@@ -1,95 +1,217 @@
-from typing import Dict, List, Tuple
-from api import client
-import time
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple
+import api
+
+import numpy as np
+import requests
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from requests.adapters import HTTPAdapter
+
+from clock import wall_clock
+from ranking import Ranking
+from snapshot_ring import SnapshotRing
+from suspension import SuspensionManager
+from symbols import SymbolTable
+
+# Pairs per 24hr ticker request, the most Binance serves at weight 2
+TICKER_CHUNK = 20
+
+# Failed ticker requests, rejected by Binance or lost on the way
+API_ERRORS = (BinanceAPIException, BinanceRequestException,
+              requests.RequestException)
+
+
+class MarketSnapshot(NamedTuple):
+    """Prices of one decision tick, shared by every consumer of the tick"""
+    vector: np.ndarray  # (symbol id x {price, 24hr %})
+    timestamp: float
+    tick: int
 
 
 class Bucket:
-    def __init__(self, lst: List[str], snapshot_queue_size):
-        self.lst = lst
-        self.suspension_queue = []
+    def __init__(self, lst: List[str], snapshot_queue_size, bulk=True,
+                 stream=None, max_concurrency=8, max_price_age=5, quote='USDT',
+                 client=None, clock=wall_clock, recorder=None):
+        self.client = client if client is not None else api.client
+        self.clock = clock
+
+        # Tradable pairs are held by symbol id, see self.symbols
+        self.symbols = SymbolTable(lst, quote)
+        self.lst = [self.symbols.id(pair) for pair in lst]
+        self.bulk = bulk
+        self.stream = stream
+        # Optional tick_log.TickRecorder keeping every fetched tick
+        self.recorder = recorder
+
+        # Bounded pool for the per-symbol fallback, sharing the client's
+        # keep-alive session with one pooled connection per worker
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        if hasattr(self.client, 'session'):
+            self.client.session.mount('https://', HTTPAdapter(
+                pool_connections=1, pool_maxsize=max_concurrency))
+        self.suspensions = SuspensionManager()
 
         self.snapshot_queue_size = snapshot_queue_size
-        self.snapshot_queue = []
-        self.average_snapshot = None
+        self.snapshot_queue = SnapshotRing(len(self.symbols),
+                                           snapshot_queue_size)
+        # Average price of every symbol id over the snapshot queue
+        self.average_vector = None
         self.cache_snapshot = None
 
-        self.prices = self.get_prices()
+        self._lst_version = 0
+        self._ranking = None
+        self._ranking_key = None
+        # Base names of self.lst, rebuilt when it changes
+        self._lst_bases = None
+
+        self.max_price_age = max_price_age
+        # PriceBoard version of the latest tick read from the stream, and
+        # whether the latest fetch brought data not seen before
+        self._stream_version = None
+        self._new_data = False
+        self.tick = 0
+        self.prices = None
+        self.refresh(0)
+
+    def ranking(self) -> Ranking:
+        """Rank the tradable pairs by their delta against the average snapshot"""
+        key = (self.prices.tick, self.snapshot_queue.count, self._lst_version)
+        if self._ranking_key != key:
+            if self._ranking_key is None or self._ranking_key[2] != key[2]:
+                self._lst_bases = [self.symbols.base(id_) for id_ in self.lst]
+            self._ranking = Ranking(self._lst_bases,
+                                    self.prices.vector[self.lst, 0],
+                                    self.average_vector[self.lst])
+            self._ranking_key = key
+        return self._ranking
 
     def max_fall(self) -> Tuple[str, float]:
-        symbol = self.lst[0][:-4]
-        price = self.prices[0][symbol][0]
-        snapshot = self.average_snapshot[0][symbol][0]
-        max_ = (price - snapshot) / snapshot * 100
-
-        for i in range(1, len(self.lst)):
-            symbol_new = self.lst[i][:-4]
-            price_new = self.prices[0][symbol_new][0]
-            snapshot_new = self.average_snapshot[0][symbol_new][0]
-            max_new = (price_new - snapshot_new) / snapshot_new * 100
-            if max_new < max_:
-                max_ = max_new
-                symbol = symbol_new
-        return symbol, max_
+        return self.ranking().max_fall()
 
     def max_rise(self) -> Tuple[str, float]:
-        symbol = self.lst[0][:-4]
-        price = self.prices[0][symbol][0]
-        snapshot = self.average_snapshot[0][symbol][0]
-        max_ = (price - snapshot) / snapshot * 100
-
-        for i in range(1, len(self.lst)):
-            symbol_new = self.lst[i][:-4]
-            price_new = self.prices[0][symbol_new][0]
-            snapshot_new = self.average_snapshot[0][symbol_new][0]
-            max_new = (price_new - snapshot_new) / snapshot_new * 100
-            if max_new > max_:
-                max_ = max_new
-                symbol = symbol_new
-        return symbol, max_
-
-    def suspend(self, coin: str):
-        pair = coin + 'USDT'
-        price = self.prices[0][coin][0]
-        self.lst.remove(pair)
-        self.suspension_queue.append((pair, time.time(), price))
-
-    def unsuspend(self, index=0):
-        self.lst.append(self.suspension_queue.pop(index)[0])
+        return self.ranking().max_rise()
+
+    def suspend(self, symbol: int):
+        price = float(self.prices.vector[symbol, 0])
+        self.lst.remove(symbol)
+        self.suspensions.suspend(symbol, self.clock.time(), price)
+        self._lst_version += 1
+
+    def release_expired(self, suspension_time: float) -> List[int]:
+        """Unsuspend every symbol suspended for over suspension_time"""
+        return self._unsuspend(
+            self.suspensions.release_expired(self.clock.time(), suspension_time))
+
+    def release_all(self) -> List[int]:
+        return self._unsuspend(self.suspensions.release_all())
+
+    def _unsuspend(self, symbols: List[int]) -> List[int]:
+        if symbols:
+            self.lst.extend(symbols)
+            self._lst_version += 1
+        return symbols
 
     def take_snapshot(self):
         """Take a snapshot and calculate the average in the queue"""
-        self.snapshot_queue.append(self.get_prices())
-
-        if len(self.snapshot_queue) > self.snapshot_queue_size:
-            self.snapshot_queue.pop(0)
-
-        dict_ = {}
-        for coin in self.snapshot_queue[0][0]:
-            lst_snapshot = []
-            lst_24hr = []
-            for i in range(len(self.snapshot_queue)):
-                lst_snapshot.append(self.snapshot_queue[i][0][coin][0])
-                lst_24hr.append(self.snapshot_queue[i][0][coin][1])
-            avg_snapshot = sum(lst_snapshot) / len(lst_snapshot)
-            avg_24hr = sum(lst_24hr) / len(lst_24hr)
-            dict_[coin] = avg_snapshot, avg_24hr
-
-        self.average_snapshot = dict_, self.snapshot_queue[-1][1]
-
-    def get_prices(self) -> Tuple[Dict, float]:
-        dict = {}
-        for pair in self.lst:
-            dict[pair[:-4]] = (float(client.get_symbol_ticker(symbol=pair)['price']),
-                               float(client.get_ticker(symbol=pair)['priceChangePercent']))
-        for symbol in self.suspension_queue:
-            dict[symbol[0][:-4]] = (float(client.get_symbol_ticker(symbol=symbol[0])['price']),
-                                    float(client.get_ticker(symbol=symbol[0])['priceChangePercent']))
-        return dict, time.time()
+        prices = self.refresh()
+        self.push_snapshot(prices.vector, prices.timestamp)
+
+    def push_snapshot(self, vector: np.ndarray, timestamp: float):
+        """Enqueue a (symbol id x {price, 24hr %}) snapshot, e.g. from history"""
+        self.snapshot_queue.push(vector, timestamp)
+        self.average_vector = self.snapshot_queue.average()[:, 0]
+
+    def refresh(self, max_age=None) -> MarketSnapshot:
+        """
+        Return the market snapshot of the current tick. A new tick is only
+        fetched when the current one is older than max_age seconds
+        (max_price_age by default, 0 to force a new tick).
+        """
+        if max_age is None:
+            max_age = self.max_price_age
+
+        if self.prices is None or self.clock.time() - self.prices.timestamp >= max_age:
+            vector, timestamp = self.get_prices()
+            # Only new data, a stream read that timed out repeats the board
+            if self.recorder is not None and self._new_data:
+                self.recorder.record(vector, timestamp, self.symbols.pairs)
+            self.tick += 1
+            self.prices = MarketSnapshot(vector, timestamp, self.tick)
+        return self.prices
+
+    def get_prices(self) -> Tuple[np.ndarray, float]:
+        """
+        Return the (symbol id x {price, 24hr %}) prices of every registered
+        pair, tradable or suspended.
+        """
+        self._new_data = True
+        if self.stream is not None and self.stream.is_live(self.symbols.pairs):
+            return self._get_prices_stream()
+        if self.bulk:
+            try:
+                return self._get_prices_bulk()
+            except (KeyError,) + API_ERRORS as e:
+                # e.g. -1121 for the whole request when a pair is delisted
+                print(f'Bulk ticker failed ({e!r}), falling back to per-symbol fetch')
+        return self._get_prices_per_symbol()
+
+    def _get_prices_stream(self) -> Tuple[np.ndarray, float]:
+        """
+        Read prices from the streaming price board, no network I/O. Waits for
+        an update since the last read (for up to max_staleness seconds, after
+        which the stream is no longer live), so every tick carries new data
+        and the trading loop is paced by the market instead of spinning.
+        """
+        previous = self._stream_version
+        self.stream.board.wait(previous, self.stream.max_staleness)
+        board, self._stream_version = self.stream.board.read(self.symbols.pairs)
+        self._new_data = self._stream_version != previous
+        return np.array([board[pair] for pair in self.symbols.pairs]), self.clock.time()
+
+    def _get_prices_bulk(self) -> Tuple[np.ndarray, float]:
+        """
+        Fetch every price and 24hr change with one 24hr ticker request per
+        TICKER_CHUNK pairs, concurrently. A tick weighs 2 per request,
+        2 * ceil(pairs / 20) (4 for 24 pairs), where the all-symbol ticker
+        weighs 80 and downloads every symbol on the exchange.
+        """
+        pairs = self.symbols.pairs
+        chunks = [pairs[i:i + TICKER_CHUNK]
+                  for i in range(0, len(pairs), TICKER_CHUNK)]
+        tickers = {ticker['symbol']: ticker
+                   for chunk in self.executor.map(self._get_tickers, chunks)
+                   for ticker in chunk}
+
+        vector = np.empty((len(self.symbols), 2))
+        for id_, pair in enumerate(self.symbols.pairs):
+            vector[id_] = (float(tickers[pair]['lastPrice']),
+                           float(tickers[pair]['priceChangePercent']))
+        return vector, self.clock.time()
+
+    def _get_tickers(self, pairs: List[str]) -> List[Dict]:
+        return self.client.get_ticker(symbols=json.dumps(pairs,
+                                                         separators=(',', ':')))
+
+    def _get_prices_per_symbol(self) -> Tuple[np.ndarray, float]:
+        """
+        Fetch every pair's 24hr ticker individually, at most max_concurrency
+        at a time. It holds the price as well, so a pair is one request.
+        """
+        results = self.executor.map(self._get_pair_price, self.symbols.pairs)
+        return np.array(list(results)), self.clock.time()
+
+    def _get_pair_price(self, pair: str) -> Tuple[float, float]:
+        """The pair's price and 24hr change, the last ones if it is rejected"""
+        try:
+            ticker = self.client.get_ticker(symbol=pair)
+        except API_ERRORS as e:
+            if self.prices is None:
+                raise
+            print(f'No ticker for {pair} ({e}), keeping its last price')
+            return tuple(self.prices.vector[self.symbols.id(pair)])
+        return float(ticker['lastPrice']), float(ticker['priceChangePercent'])
 
     def get_24hr_avg_delta(self):
-        sum_ = 0
-        for pair in self.lst:
-            sum_ += self.prices[0][pair[:-4]][1]
-        for symbol in self.suspension_queue:
-            sum_ += self.prices[0][symbol[0][:-4]][1]
-        return sum_ / (len(self.lst) + len(self.suspension_queue))
+        return float(self.prices.vector[:, 1].mean())
@@ -0,0 +1,47 @@
+import threading
+import time
+
+
+class WallClock:
+    """Real time, the default time source of every component"""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(max(seconds, 0))
+
+
+class VirtualClock:
+    """
+    Simulated time. Time only moves when it is slept through or
+    advanced to, so a 3-day rebound wait or a 45-minute cooldown completes
+    instantly.
+
+    Every thread shares the one timeline: a sleep from any thread advances it,
+    so background threads must not sleep on it (see OrderTracker).
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.advance_to(self.now + max(seconds, 0))
+
+    def advance_to(self, when: float):
+        """Move to when, never rewinds"""
+        with self._lock:
+            self.now = max(self.now, when)
+
+
+wall_clock = WallClock()
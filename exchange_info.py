@@ -0,0 +1,77 @@
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from clock import wall_clock
+from symbols import SymbolTable
+
+
+class SymbolFilters(NamedTuple):
+    step_size: float
+    lot_precision: int
+    min_notional: float
+    tick_size: float
+
+
+class ExchangeInfo:
+    """
+    Trading filters of every registered symbol, loaded with a single exchange
+    info request, persisted to disk (unless path is None) and refreshed once
+    older than ttl seconds.
+    """
+
+    def __init__(self, client, symbols: SymbolTable,
+                 path: Optional[str] = 'exchange_info.json', ttl: float = 86400, clock=wall_clock):
+        self.client = client
+        self.clock = clock
+        self.symbols = symbols
+        self.path = path
+        self.ttl = ttl
+
+        self.filters: List[SymbolFilters] = []
+        self.updated = None
+        self.load()
+
+    def get(self, symbol: int) -> SymbolFilters:
+        if self.clock.time() - self.updated > self.ttl:
+            self.refresh()
+        return self.filters[symbol]
+
+    def load(self):
+        """Load the filters from disk, fetching them when missing or stale"""
+        if self.path is not None and os.path.exists(self.path):
+            with open(self.path) as f:
+                cache = json.load(f)
+            if self.clock.time() - cache['updated'] <= self.ttl and \
+                    all(pair in cache['filters'] for pair in self.symbols.pairs):
+                self._build(cache['filters'], cache['updated'])
+                return
+        self.refresh()
+
+    def refresh(self):
+        raw = {}
+        for info in self.client.get_exchange_info()['symbols']:
+            if info['symbol'] in self.symbols:
+                raw[info['symbol']] = {filt['filterType']: filt
+                                       for filt in info['filters']}
+        updated = self.clock.time()
+        self._build(raw, updated)
+
+        if self.path is not None:
+            with open(self.path, 'w') as f:
+                json.dump({'updated': updated, 'filters': raw}, f)
+
+    def _build(self, raw: Dict, updated: float):
+        filters = []
+        for pair in self.symbols.pairs:
+            symbol_filters = raw[pair]
+            step_size = symbol_filters['LOT_SIZE']['stepSize']
+            notional = symbol_filters.get('NOTIONAL',
+                                          symbol_filters.get('MIN_NOTIONAL', {}))
+            filters.append(SymbolFilters(
+                step_size=float(step_size),
+                lot_precision=step_size.find('1') - 2,
+                min_notional=float(notional.get('minNotional', 0)),
+                tick_size=float(symbol_filters['PRICE_FILTER']['tickSize'])))
+        self.filters = filters
+        self.updated = updated
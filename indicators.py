@@ -0,0 +1,79 @@
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+
+class IndicatorHistory:
+    """
+    Ring of the latest BASELINE indicator values with a running sum, so the
+    INVERSION indicator's historical mean is O(1).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values = np.zeros(capacity)
+        self.timestamps = np.zeros(capacity)
+        self.sum = 0.0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def push(self, value: float, timestamp: float):
+        slot = self.count % self.capacity
+        if self.count >= self.capacity:
+            self.sum -= self.values[slot]
+        self.values[slot] = value
+        self.timestamps[slot] = timestamp
+        self.sum += value
+        self.count += 1
+
+        # Resynchronize once per revolution so rounding errors cannot build up
+        if self.count % self.capacity == 0:
+            self.sum = float(self.values.sum())
+
+    def mean(self) -> float:
+        return self.sum / len(self)
+
+    @property
+    def latest_timestamp(self) -> float:
+        return float(self.timestamps[(self.count - 1) % self.capacity])
+
+
+class Indicators(NamedTuple):
+    cardinality: int
+    above_average: int  # symbols above their average snapshot
+    above_latest: int  # symbols above their latest-window baseline
+    positive_24hr: int  # symbols with a positive 24hr change
+    inversion: float
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'BASELINE': self.above_average / self.cardinality,
+                '24HR': self.positive_24hr / self.cardinality,
+                'LATEST': self.above_latest / self.cardinality,
+                'INVERSION': self.inversion}
+
+
+def market_indicators(prices: np.ndarray, averages: np.ndarray,
+                      latest: np.ndarray, changes: np.ndarray,
+                      history: IndicatorHistory, now: float,
+                      history_interval: float) -> Indicators:
+    """
+    Compute the four market indicators in a single pass over the price,
+    average snapshot, latest-window baseline and 24hr change vectors.
+
+    The BASELINE indicator is enqueued in history when it is empty or its last
+    entry is older than history_interval, and INVERSION is the BASELINE
+    indicator minus the history mean.
+    """
+    cardinality = len(prices)
+    above_average = int(np.count_nonzero(prices > averages))
+    above_latest = int(np.count_nonzero(prices > latest))
+    positive_24hr = int(np.count_nonzero(changes > 0))
+
+    baseline = above_average / cardinality
+    if not len(history) or now - history.latest_timestamp > history_interval:
+        history.push(baseline, now)
+
+    return Indicators(cardinality, above_average, above_latest, positive_24hr,
+                      baseline - history.mean())
@@ -0,0 +1,324 @@
+"""
+Download the kline history of many pairs into a local columnar cache, and
+serve it back for backtests and warm starts.
+
+Every pair is fetched by its own worker, page after page, sharing one request
+weight budget per minute. Rerunning a download continues every pair from its
+last stored kline.
+
+    python klines.py BTCUSDT ETHUSDT --start 2021-01-01 [--end 2021-06-01] \\
+        [--interval 1m] [--directory klines] [--output replay.npz]
+
+--output also writes the cached range as a backtest.py replay.
+"""
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from clock import wall_clock
+from sim_client import DAY, daily_changes
+
+BINANCE_API_URL = 'https://api.binance.com'
+LIMIT = 1000  # klines per request, the most Binance serves
+# Binance allows 6000 weight per minute per IP, leave room for the live bot
+WEIGHT_LIMIT = 4800
+
+# Stored columns, open_time (ms) is the time index of every pair
+COLUMNS = {'open_time': '<i8', 'open': '<f8', 'high': '<f8', 'low': '<f8',
+           'close': '<f8', 'volume': '<f8', 'quote_volume': '<f8',
+           'trades': '<i8'}
+# Position of every column in a Binance kline row
+FIELDS = {'open_time': 0, 'open': 1, 'high': 2, 'low': 3, 'close': 4,
+          'volume': 5, 'quote_volume': 7, 'trades': 8}
+UNITS = {'m': 60, 'h': 3600, 'd': DAY, 'w': 7 * DAY}
+
+
+def interval_seconds(interval: str) -> int:
+    """Length of a kline interval ('1m', '4h', '1d'...) in seconds"""
+    if len(interval) < 2 or interval[-1] not in UNITS or not interval[:-1].isdigit():
+        raise ValueError(f'Unsupported kline interval {interval}')
+    return int(interval[:-1]) * UNITS[interval[-1]]
+
+
+def kline_weight(limit: int) -> int:
+    """Request weight of GET /api/v3/klines for limit klines"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    return 5 if limit <= 1000 else 10
+
+
+class KlineStore:
+    """
+    Klines of every pair in directory/interval/PAIR/, one raw little-endian
+    file per column, so any column is memory-mapped on its own and appended
+    to in place. Queries binary-search the open_time column and slice the
+    others, reading only the pages of the requested range.
+    """
+
+    def __init__(self, directory: str, interval: str = '1m'):
+        self.interval = interval
+        self.seconds = interval_seconds(interval)
+        self.directory = os.path.join(directory, interval)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, pair: str, column: str) -> str:
+        return os.path.join(self.directory, pair, f'{column}.bin')
+
+    def pairs(self) -> List[str]:
+        return sorted(os.listdir(self.directory))
+
+    def __contains__(self, pair: str) -> bool:
+        return os.path.isdir(os.path.join(self.directory, pair))
+
+    def length(self, pair: str) -> int:
+        """Complete rows of a pair, a row is complete once every column has it"""
+        if pair not in self:
+            return 0
+        return min(os.path.getsize(self.path(pair, column)) // np.dtype(dtype).itemsize
+                   if os.path.exists(self.path(pair, column)) else 0
+                   for column, dtype in COLUMNS.items())
+
+    def repair(self, pair: str):
+        """Drop the rows an interrupted append left incomplete"""
+        length = self.length(pair)
+        for column, dtype in COLUMNS.items():
+            path = self.path(pair, column)
+            if os.path.exists(path):
+                os.truncate(path, length * np.dtype(dtype).itemsize)
+
+    def column(self, pair: str, column: str) -> np.ndarray:
+        """Memory map of the complete rows of a column"""
+        length = self.length(pair)
+        if length == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self.path(pair, column), dtype=COLUMNS[column],
+                         mode='r', shape=(length,))
+
+    def last_open_time(self, pair: str) -> Optional[int]:
+        times = self.column(pair, 'open_time')
+        return int(times[-1]) if len(times) else None
+
+    def append(self, pair: str, rows: Dict[str, np.ndarray]):
+        os.makedirs(os.path.join(self.directory, pair), exist_ok=True)
+        for column, dtype in COLUMNS.items():
+            with open(self.path(pair, column), 'ab') as f:
+                f.write(np.ascontiguousarray(rows[column], dtype=dtype).tobytes())
+
+    def get(self, pair: str, start: Optional[float] = None,
+            end: Optional[float] = None,
+            columns: Sequence[str] = tuple(COLUMNS)) -> Dict[str, np.ndarray]:
+        """Columns of the klines opened in [start, end) seconds, without copying"""
+        times = self.column(pair, 'open_time')
+        lo = 0 if start is None else int(np.searchsorted(times, start * 1000))
+        hi = len(times) if end is None else int(np.searchsorted(times, end * 1000))
+        return {column: self.column(pair, column)[lo:hi] for column in columns}
+
+    def replay(self, pairs: Sequence[str], start: Optional[float] = None,
+               end: Optional[float] = None
+               ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (pairs, timestamps, prices, changes) as backtest.load_replay returns
+        them: close prices at every kline close in [start, end), with the 24hr
+        change against the close a day earlier. Missing klines keep the last
+        close, and the replay starts once every pair has one.
+        """
+        # A day of history before start for the first 24hr changes
+        since = None if start is None else start - DAY
+        data = [self.get(pair, since, end, ('open_time', 'close')) for pair in pairs]
+        times = np.unique(np.concatenate([np.asarray(rows['open_time'])
+                                          for rows in data]))
+        prices = np.full((len(times), len(pairs)), np.nan)
+        for i, rows in enumerate(data):
+            prices[np.searchsorted(times, rows['open_time']), i] = rows['close']
+
+        recorded = ~np.isnan(prices)
+        last = np.maximum.accumulate(
+            np.where(recorded, np.arange(len(times))[:, None], 0), axis=0)
+        prices = prices[last, np.arange(len(pairs))]
+        first = int(recorded.all(axis=1).argmax()) if recorded.all(axis=1).any() \
+            else len(times)
+        times, prices = times[first:], prices[first:]
+        changes = daily_changes(prices, self.seconds)
+
+        timestamps = times / 1000 + self.seconds
+        keep = slice(None) if start is None else \
+            slice(int(np.searchsorted(times, start * 1000)), None)
+        return list(pairs), timestamps[keep], prices[keep], changes[keep]
+
+
+class WeightLimiter:
+    """
+    Per-minute request weight budget shared by every worker. Binance resets
+    the used weight every clock minute and reports it on every response,
+    which is taken over when it is ahead of the local count.
+    """
+
+    def __init__(self, limit: int = WEIGHT_LIMIT, clock=wall_clock):
+        self.limit = limit
+        self.clock = clock
+        self.used = 0
+        self._minute = None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int):
+        """Wait until weight fits in the budget of the current minute"""
+        while True:
+            with self._lock:
+                now = self.clock.time()
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    minute = int(now // 60)
+                    if minute != self._minute:
+                        self._minute, self.used = minute, 0
+                    if self.used + weight <= self.limit:
+                        self.used += weight
+                        return
+                    wait = (minute + 1) * 60 - now
+            self.clock.sleep(wait)
+
+    def update(self, used: int):
+        with self._lock:
+            if int(self.clock.time() // 60) == self._minute:
+                self.used = max(self.used, used)
+
+    def back_off(self, seconds: float):
+        """Stop every request for seconds, on a 429 or 418 response"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until,
+                                      self.clock.time() + seconds)
+
+
+class KlineDownloader:
+    """
+    Fetch klines into a KlineStore, max_workers pairs at a time. base_url can
+    point to any server speaking the Binance REST API, e.g. a local stand-in
+    during testing.
+    """
+
+    def __init__(self, store: KlineStore, base_url: str = BINANCE_API_URL,
+                 max_workers: int = 8, weight_limit: int = WEIGHT_LIMIT,
+                 retries: int = 5, timeout: float = 10, session=None,
+                 clock=wall_clock):
+        self.store = store
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.retries = retries
+        self.timeout = timeout
+        self.clock = clock
+        self.limiter = WeightLimiter(weight_limit, clock)
+
+        self.session = session if session is not None else requests.Session()
+        self.session.mount(self.base_url, HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_workers))
+
+    def download(self, pairs: Sequence[str], start: float,
+                 end: Optional[float] = None) -> Dict[str, int]:
+        """
+        Fetch the closed klines of every pair from start (or its last stored
+        kline) to end seconds, now by default, and return the rows added.
+        """
+        end = self.clock.time() if end is None else end
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            added = executor.map(lambda pair: self._download(pair, start, end),
+                                 pairs)
+            return dict(zip(pairs, added))
+
+    def _download(self, pair: str, start: float, end: float) -> int:
+        self.store.repair(pair)
+        step = self.store.seconds * 1000
+        last = self.store.last_open_time(pair)
+        since = int(start * 1000) if last is None else max(int(start * 1000),
+                                                          last + step)
+        # Only klines closed by end, the current one is still moving
+        until = int(end * 1000) - step
+
+        added = 0
+        while since <= until:
+            rows = self._get(pair, since, until)
+            rows = [row for row in rows if row[0] <= until]
+            if not rows:
+                break
+            self.store.append(pair, {column: [row[field] for row in rows]
+                                     for column, field in FIELDS.items()})
+            added += len(rows)
+            since = rows[-1][0] + step
+        print(f'{pair}: {added} klines added, {self.store.length(pair)} stored')
+        return added
+
+    def _get(self, pair: str, since: int, until: int) -> List[list]:
+        params = {'symbol': pair, 'interval': self.store.interval,
+                  'startTime': since, 'endTime': until, 'limit': LIMIT}
+        for attempt in range(self.retries):
+            self.limiter.acquire(kline_weight(LIMIT))
+            try:
+                response = self.session.get(f'{self.base_url}/api/v3/klines',
+                                            params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f'{pair}: {e}, retrying')
+                self.clock.sleep(2 ** attempt)
+                continue
+
+            used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+            if used is not None:
+                self.limiter.update(int(used))
+            if response.status_code in (418, 429):
+                self.limiter.back_off(float(response.headers.get('Retry-After', 60)))
+                continue
+            if response.status_code >= 500:
+                self.clock.sleep(2 ** attempt)
+                continue
+            response.raise_for_status()
+            return [[int(value) if isinstance(value, int) else float(value)
+                     for value in row] for row in response.json()]
+        raise RuntimeError(f'{pair}: klines request failed {self.retries} times')
+
+
+def _parse_time(value: str) -> float:
+    """Seconds since the epoch, or a UTC ISO date"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).replace(
+            tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n\n'.join(__doc__.split('\n\n')[1:]))
+    parser.add_argument('pairs', nargs='+')
+    parser.add_argument('--start', type=_parse_time, required=True)
+    parser.add_argument('--end', type=_parse_time)
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--directory', default='klines')
+    parser.add_argument('--base-url', default=BINANCE_API_URL)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--weight-limit', type=int, default=WEIGHT_LIMIT)
+    parser.add_argument('--output', help='write the range as a .npz replay')
+    args = parser.parse_args()
+
+    store = KlineStore(args.directory, args.interval)
+    KlineDownloader(store, args.base_url, args.workers,
+                    args.weight_limit).download(args.pairs, args.start, args.end)
+    if args.output:
+        pairs, timestamps, prices, changes = \
+            store.replay(args.pairs, args.start, args.end)
+        np.savez(args.output, pairs=np.array(pairs), timestamps=timestamps,
+                 prices=prices, changes=changes)
+        print(f'{len(timestamps)} ticks of {len(pairs)} pairs written to '
+              f'{args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,30 +4,41 @@ from bucket import Bucket
 from strategy import Strategy_Baseline
 import api
 from bot import Bot
+from market_stream import MarketStream
+from tick_log import TickRecorder
+from warm_start import load_history
+from account import AccountState, UserDataStream
+from orders import OrderTracker
 
-from strategies_avg_baselines import *
-from strategies_24hr_multipliers import *
-from strategies_latest_multipliers import *
-from strategies_trend_inversion_multiplier import *
+from configuration import *
 
+# Bucket Configuration
+################################################################################
+PAIRS = ['AAVEUSDT', 'ADAUSDT', 'XLMUSDT', 'EOSUSDT',
+         'XMRUSDT', 'UNIUSDT', 'CRVUSDT', 'LINKUSDT', 'SOLUSDT',
+         'XRPUSDT', 'MANAUSDT', 'ENJUSDT', 'LUNAUSDT', 'ETHUSDT',
+         'BTCUSDT', 'DOTUSDT', 'BATUSDT', 'DOGEUSDT',
+         'GRTUSDT', 'ATOMUSDT', 'FILUSDT', 'BNBUSDT', 'LTCUSDT', 'YFIUSDT']
 
+# Every fetched tick is appended here, see tick_log.py
+TICK_LOG = 'ticks.bin'
+# Klines cached for warm starts when the tick log does not cover the queue
+KLINE_DIRECTORY = 'klines'
 
-STRATEGY_BASELINE = [bear_minus_minus, bear_minus, bear, bear_plus, bull_minus, bull, bull_plus, bull_plus_plus]
-STRATEGY_MULITIPLIER_24HR = [m1_bear_minus_minus, m1_bear_minus, m1_bear, m1_bear_plus, m1_bull_minus, m1_bull, m1_bull_plus, m1_bull_plus_plus]
-STRATEGY_MULITIPLIER_LATEST = [m2_bear_minus_minus, m2_bear_minus, m2_bear, m2_bear_plus, m2_bull_minus, m2_bull, m2_bull_plus, m2_bull_plus_plus]
-STRATEGY_TREND_INVERSION = [minus_minus, minus, equals, minus, plus, plus_plus]
-STRATEGY_CONFIGURATION = {'BASELINE': STRATEGY_BASELINE, '24HR': STRATEGY_MULITIPLIER_24HR, 'LATEST': STRATEGY_MULITIPLIER_LATEST, 'INVERSION': STRATEGY_TREND_INVERSION}
+# Backfills the snapshot queue, see Bot.warm_start
+HISTORY = load_history(PAIRS, time.time(), SNAPSHOT_QUEUE_SIZE - 1,
+                       tick_log=TICK_LOG, kline_directory=KLINE_DIRECTORY)
 
-# Bucket Configuration
-################################################################################
-BUCKET = Bucket(
-                ['AAVEUSDT', 'ADAUSDT', 'XLMUSDT', 'EOSUSDT',
-                 'XMRUSDT', 'UNIUSDT', 'CRVUSDT', 'LINKUSDT', 'SOLUSDT',
-                 'XRPUSDT', 'MANAUSDT', 'ENJUSDT', 'LUNAUSDT', 'ETHUSDT',
-                 'BTCUSDT', 'DOTUSDT', 'BATUSDT', 'DOGEUSDT',
-                 'GRTUSDT', 'ATOMUSDT', 'FILUSDT', 'BNBUSDT', 'LTCUSDT', 'YFIUSDT'],
-                SNAPSHOT_QUEUE_SIZE)
+BUCKET = Bucket(list(PAIRS), SNAPSHOT_QUEUE_SIZE,
+                stream=MarketStream(PAIRS).start(),
+                recorder=TickRecorder(TICK_LOG))
 ################################################################################
 
-bot = Bot(STRATEGY_CONFIGURATION, BUCKET, 'USDT')
+USER_DATA_STREAM = UserDataStream(api.client)
+ACCOUNT = AccountState(api.client, USER_DATA_STREAM)
+ORDERS = OrderTracker(api.client, USER_DATA_STREAM)
+USER_DATA_STREAM.start()
+
+bot = Bot(STRATEGY_CONFIGURATION, BUCKET, 'USDT', account=ACCOUNT,
+          orders=ORDERS, history=HISTORY)
 bot.run()
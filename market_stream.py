@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Tuple
+
+import websockets
+
+from clock import wall_clock
+
+BINANCE_STREAM_URL = 'wss://stream.binance.com:9443'
+
+
+class PriceBoard:
+    """
+    In-memory board of the latest (price, 24hr change %) of every pair.
+    version counts the updates, so readers can wait for data they have not
+    seen yet.
+    """
+
+    def __init__(self, clock=wall_clock):
+        self.clock = clock
+        self._board = {}
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+        self.last_update = None
+        self.version = 0
+
+    def update(self, pair: str, price: float, change: float):
+        with self._updated:
+            self._board[pair] = (price, change)
+            self.last_update = self.clock.time()
+            self.version += 1
+            self._updated.notify_all()
+
+    def wait(self, version: Optional[int], timeout: float) -> bool:
+        """Wait up to timeout seconds for a version other than version"""
+        with self._updated:
+            return self._updated.wait_for(lambda: self.version != version,
+                                          timeout)
+
+    def read(self, pairs: Iterable[str]) -> Tuple[Dict[str, Tuple[float, float]], int]:
+        """The entries of pairs and the version they were read at"""
+        with self._lock:
+            return {pair: self._board[pair] for pair in pairs}, self.version
+
+    def get(self, pair: str) -> Tuple[float, float]:
+        with self._lock:
+            return self._board[pair]
+
+    def has(self, pairs: Iterable[str]) -> bool:
+        with self._lock:
+            return all(pair in self._board for pair in pairs)
+
+
+class WebSocketStream(ABC):
+    """
+    Listen to a websocket from a background thread, reconnecting on failure.
+    Subclasses provide stream_url and handle every decoded event, and can
+    hook connections through _resolve_url, _connected and _disconnected.
+
+    url can point to any server speaking the Binance stream protocol, e.g. a
+    local stand-in during testing.
+    """
+
+    def __init__(self, url: str = BINANCE_STREAM_URL, reconnect_delay: float = 1):
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+
+        self._loop = None
+        self._thread = None
+        self._running = False
+
+    @property
+    @abstractmethod
+    def stream_url(self) -> str:
+        """URL to connect to, evaluated on every connection"""
+
+    @abstractmethod
+    def _handle(self, event: Dict):
+        """Handle one decoded event, on the stream's thread"""
+
+    async def _resolve_url(self) -> str:
+        """stream_url, for subclasses needing blocking calls to build it"""
+        return self.stream_url
+
+    def _connected(self):
+        pass
+
+    def _disconnected(self):
+        pass
+
+    def start(self):
+        self._running = True
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete,
+                                        args=(self._listen(),), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._loop is not None:
+            for task in asyncio.all_tasks(self._loop):
+                self._loop.call_soon_threadsafe(task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    async def _listen(self):
+        while self._running:
+            try:
+                async with websockets.connect(await self._resolve_url()) as ws:
+                    self._connected()
+                    try:
+                        async for message in ws:
+                            event = json.loads(message)
+                            # Combined streams wrap the payload, raw streams
+                            # do not
+                            self._handle(event.get('data', event))
+                    finally:
+                        self._disconnected()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f'{type(self).__name__} disconnected\n{e}\nReconnecting...')
+                await asyncio.sleep(self.reconnect_delay)
+
+
+class MarketStream(WebSocketStream):
+    """
+    Subscribe to the 24hr ticker stream of every given pair and keep a
+    PriceBoard up to date from a background thread.
+    """
+
+    def __init__(self, pairs: Iterable[str], url: str = BINANCE_STREAM_URL,
+                 max_staleness: float = 10, reconnect_delay: float = 1,
+                 clock=wall_clock):
+        super().__init__(url, reconnect_delay)
+        self.pairs = list(pairs)
+        self.max_staleness = max_staleness
+
+        self.clock = clock
+        self.board = PriceBoard(clock)
+
+    @property
+    def stream_url(self) -> str:
+        streams = '/'.join(f'{pair.lower()}@ticker' for pair in self.pairs)
+        return f'{self.url}/stream?streams={streams}'
+
+    def is_live(self, pairs: Optional[Iterable[str]] = None) -> bool:
+        """Whether the board is fresh and holds every requested pair"""
+        if self.board.last_update is None or \
+                self.clock.time() - self.board.last_update > self.max_staleness:
+            return False
+        return self.board.has(self.pairs if pairs is None else pairs)
+
+    def get_prices(self, pairs: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+        return self.board.read(pairs)[0]
+
+    def _handle(self, event: Dict):
+        if event.get('e') == '24hrTicker':
+            self.board.update(event['s'], float(event['c']), float(event['P']))
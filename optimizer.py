@@ -0,0 +1,263 @@
+"""
+Parallel parameter sweep of the strategy modules: backtest every combination
+of the given Strategy_Baseline / Strategy_Multiplier field values across a
+process pool and rank the runs by the chosen objectives.
+
+    python optimizer.py replay.npz \\
+        --set BASELINE.fc_delta_threshold=2,3,4 \\
+        --scale 24HR.cf_rebound_ratio=0.8,1,1.2 \\
+        --set BASELINE:BEAR--.suspension_time=86400,259200 \\
+        --objectives sharpe return_pct --top 10
+
+--set assigns the values to the field, --scale multiplies the configured
+field by them. COMPONENT.field applies to every strategy of the component,
+COMPONENT:NAME.field only to the strategy called NAME. The replay is shared
+with the workers read-only through memory-mapped .npy files.
+"""
+import argparse
+import copy
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from backtest import BacktestResult, load_replay, run_backtest
+from batch import YEAR, run_batch
+from strategy import COMPONENTS, PARAMETERS
+
+FIELDS = {name for name, _ in PARAMETERS}
+
+# Objective name -> whether higher is better
+OBJECTIVES = {'return_pct': True, 'sharpe': True, 'max_drawdown_pct': False,
+              'trades': False, 'fees': False}
+
+
+class Parameter(NamedTuple):
+    component: str
+    field: str
+    values: Sequence[float]
+    name: Optional[str] = None  # only the strategy of this name if given
+    scale: bool = False  # multiply the configured value instead of setting it
+
+    @property
+    def key(self) -> str:
+        target = self.component if self.name is None \
+            else f'{self.component}:{self.name}'
+        return f'{target}.{self.field}' + ('*' if self.scale else '')
+
+    @classmethod
+    def parse(cls, spec: str, scale: bool = False) -> 'Parameter':
+        """Parse COMPONENT[:NAME].field=v1,v2,..."""
+        target, values = spec.split('=', 1)
+        target, field = target.rsplit('.', 1)
+        component, _, name = target.partition(':')
+        if component not in COMPONENTS:
+            raise ValueError(f'Unknown component {component}, '
+                             f'expected one of {COMPONENTS}')
+        if field not in FIELDS:
+            raise ValueError(f'Unknown strategy field {field}')
+        return cls(component, field, [float(value) for value in values.split(',')],
+                   name or None, scale)
+
+
+class SweepResult(NamedTuple):
+    assignment: Dict[str, float]
+    metrics: Dict[str, float]
+
+
+def configure(strategy_configuration: Dict, parameters: Sequence[Parameter],
+              values: Sequence[float]) -> Dict:
+    """Copy of the configuration with every parameter set to its value"""
+    configuration = {component: [copy.copy(strategy) for strategy in strategies]
+                     for component, strategies in strategy_configuration.items()}
+    for parameter, value in zip(parameters, values):
+        matched = False
+        for strategy in configuration[parameter.component]:
+            if parameter.name is not None and strategy.name != parameter.name:
+                continue
+            current = getattr(strategy, parameter.field)
+            new = current * value if parameter.scale else value
+            # Counts stay integers, as in the strategy modules
+            if isinstance(current, int) and not isinstance(current, bool):
+                new = round(new)
+            setattr(strategy, parameter.field, new)
+            matched = True
+        if not matched:
+            raise ValueError(f'No {parameter.component} strategy named '
+                             f'{parameter.name}')
+    return configuration
+
+
+def metrics(result: BacktestResult) -> Dict[str, float]:
+    timestamps, equity = result.equity[:, 0], result.equity[:, 1]
+    returns = np.diff(equity) / equity[:-1]
+    sharpe = 0.0
+    if len(returns) > 1 and returns.std() > 0:
+        periods = YEAR / np.median(np.diff(timestamps))
+        sharpe = float(returns.mean() / returns.std() * np.sqrt(periods))
+    peaks = np.maximum.accumulate(equity)
+
+    return {'return_pct': float((equity[-1] - equity[0]) / equity[0] * 100),
+            'sharpe': sharpe,
+            'max_drawdown_pct': float(((peaks - equity) / peaks).max() * 100),
+            'trades': len(result.trades),
+            # Buy commissions are paid in the bought asset
+            'fees': float(sum(trade.commission * trade.price
+                              if trade.side == 'BUY' else trade.commission
+                              for trade in result.trades))}
+
+
+def _check_objectives(objectives: Sequence[str]):
+    for objective in objectives:
+        if objective not in OBJECTIVES:
+            raise ValueError(f'Unknown objective {objective}, '
+                             f'expected one of {list(OBJECTIVES)}')
+
+
+def rank(results: List[SweepResult], objectives: Sequence[str]) -> List[SweepResult]:
+    """Sort best first, comparing objectives in order"""
+    _check_objectives(objectives)
+    return sorted(results, key=lambda result: tuple(
+        -result.metrics[objective] if OBJECTIVES[objective]
+        else result.metrics[objective] for objective in objectives))
+
+
+# Worker state, set once per process by _init_worker
+_worker = {}
+
+
+def _init_worker(directory: str, pairs: List[str], strategy_configuration: Dict,
+                 parameters: Sequence[Parameter], backtest_options: Dict):
+    _worker.update(
+        pairs=pairs, configuration=strategy_configuration,
+        parameters=parameters, options=backtest_options,
+        **{name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+           for name in ('timestamps', 'prices', 'changes')})
+
+
+def _assignment(values: Sequence[float]) -> Dict[str, float]:
+    return {parameter.key: value
+            for parameter, value in zip(_worker['parameters'], values)}
+
+
+def _run(values: Sequence[float]) -> List[SweepResult]:
+    configuration = configure(_worker['configuration'], _worker['parameters'],
+                              values)
+    result = run_backtest(configuration, _worker['pairs'],
+                          _worker['timestamps'], _worker['prices'],
+                          _worker['changes'], **_worker['options'])
+    return [SweepResult(_assignment(values), metrics(result))]
+
+
+def _run_batch(grid: Sequence[Sequence[float]]) -> List[SweepResult]:
+    configurations = [configure(_worker['configuration'], _worker['parameters'],
+                                values) for values in grid]
+    options = dict(_worker['options'])
+    options.pop('verbose', None)
+    result = run_batch(configurations, _worker['timestamps'],
+                       _worker['prices'], _worker['changes'], **options)
+    return [SweepResult(_assignment(values),
+                        {objective: result.metrics[objective][i].item()
+                         for objective in OBJECTIVES})
+            for i, values in enumerate(grid)]
+
+
+def sweep(strategy_configuration: Dict, parameters: Sequence[Parameter],
+          pairs: Sequence[str], timestamps: np.ndarray, prices: np.ndarray,
+          changes: np.ndarray, objectives: Sequence[str] = ('return_pct',),
+          workers: Optional[int] = None, batch_size: Optional[int] = None,
+          verbose: bool = False, **backtest_options) -> List[SweepResult]:
+    """
+    Backtest every combination of parameter values on workers processes
+    (every core by default) and return the results ranked by objectives.
+
+    With batch_size, every task simulates that many combinations at once with
+    batch.run_batch instead of running one Bot per combination.
+    """
+    grid = list(itertools.product(*(parameter.values for parameter in parameters)))
+    # Validate the names before starting any worker
+    configure(strategy_configuration, parameters, grid[0])
+    _check_objectives(objectives)
+
+    directory = tempfile.mkdtemp(prefix='sweep-')
+    try:
+        for name, array in (('timestamps', timestamps), ('prices', prices),
+                            ('changes', changes)):
+            np.save(os.path.join(directory, f'{name}.npy'),
+                    np.ascontiguousarray(array, dtype=np.float64))
+
+        results = []
+        with ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                initializer=_init_worker,
+                initargs=(directory, list(pairs), strategy_configuration,
+                          list(parameters), backtest_options)) as executor:
+            if batch_size:
+                futures = [executor.submit(_run_batch,
+                                           grid[start:start + batch_size])
+                           for start in range(0, len(grid), batch_size)]
+            else:
+                futures = [executor.submit(_run, values) for values in grid]
+            for future in as_completed(futures):
+                for result in future.result():
+                    results.append(result)
+                    if verbose:
+                        print(f'{len(results)}/{len(grid)} {result.assignment} '
+                              f'{result.metrics}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return rank(results, objectives)
+
+
+def main():
+    from configuration import STRATEGY_CONFIGURATION
+
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n\n'.join(__doc__.split('\n\n')[1:]))
+    parser.add_argument('replay', help='.npz file of pairs, timestamps, '
+                                       'prices and changes')
+    parser.add_argument('--set', action='append', default=[],
+                        metavar='COMPONENT[:NAME].field=v1,v2,...')
+    parser.add_argument('--scale', action='append', default=[],
+                        metavar='COMPONENT[:NAME].field=f1,f2,...')
+    parser.add_argument('--objectives', nargs='+', default=['return_pct'],
+                        choices=list(OBJECTIVES))
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--batch-size', type=int,
+                        help='simulate this many combinations per task in one '
+                             'vectorized pass, see batch.py')
+    parser.add_argument('--balance', type=float, default=1000)
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='write every ranked result as JSON')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    parameters = [Parameter.parse(spec) for spec in args.set] + \
+                 [Parameter.parse(spec, scale=True) for spec in args.scale]
+    if not parameters:
+        parser.error('nothing to sweep, give at least one --set or --scale')
+
+    results = sweep(STRATEGY_CONFIGURATION, parameters,
+                    *load_replay(args.replay), objectives=args.objectives,
+                    workers=args.workers, batch_size=args.batch_size,
+                    verbose=args.verbose,
+                    initial_balance=args.balance, fee=args.fee)
+
+    for i, result in enumerate(results[:args.top], 1):
+        print(f'{i:>3}. {result.assignment}\n     {result.metrics}')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([result._asdict() for result in results], f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import threading
+from concurrent.futures import Future, wait
+from typing import Dict, NamedTuple
+
+from account import UserDataStream
+from clock import wall_clock
+
+TERMINAL_STATUSES = {'FILLED', 'CANCELED', 'REJECTED', 'EXPIRED',
+                     'EXPIRED_IN_MATCH'}
+
+
+class Fill(NamedTuple):
+    status: str
+    quantity: float
+    price: float  # average fill price
+    commission: float
+    commission_asset: str
+
+
+class OrderTracker:
+    """
+    Follow orders to a terminal state. Execution reports from the user-data
+    stream resolve orders as soon as they arrive, REST get_order polling with
+    exponential backoff is the fallback.
+
+    Reports are accumulated per order until it is terminal and tracked, as
+    they can arrive before track is called. Reports of orders that are never
+    tracked are dropped report_ttl seconds after their latest event.
+
+    Polling waits in real time off the clock: a poll thread sleeping on a
+    shared VirtualClock would move simulated time outside the trading loop.
+    clock only dates the reports.
+    """
+
+    def __init__(self, client, stream: UserDataStream = None,
+                 initial_backoff: float = 0.25, max_backoff: float = 8,
+                 report_ttl: float = 600, clock=wall_clock):
+        self.client = client
+        self.clock = clock
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.report_ttl = report_ttl
+
+        self._pending: Dict[int, Future] = {}
+        self._reports: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+        if stream is not None:
+            stream.subscribe('executionReport', self._on_execution_report)
+
+    def track(self, order: Dict) -> Future:
+        """Return a future resolving to the Fill of the order once terminal"""
+        future = Future()
+        if order['status'] in TERMINAL_STATUSES:
+            future.set_result(self._fill_from_response(order))
+            return future
+
+        with self._lock:
+            # Earlier reports stay until terminal, their commission included
+            report = self._reports.get(order['orderId'])
+            if report is not None and report['status'] in TERMINAL_STATUSES:
+                del self._reports[order['orderId']]
+                future.set_result(self._fill_from_report(report))
+                return future
+            self._pending[order['orderId']] = future
+
+        threading.Thread(target=self._poll, args=(order, future),
+                         daemon=True).start()
+        return future
+
+    def _poll(self, order: Dict, future: Future):
+        backoff = self.initial_backoff
+        while not future.done():
+            # Returns early once a stream report resolves the order
+            if wait([future], timeout=backoff).done:
+                break
+            backoff = min(backoff * 2, self.max_backoff)
+            try:
+                status = self.client.get_order(symbol=order['symbol'],
+                                               orderId=order['orderId'])
+            except Exception as e:
+                print(f'    Order status request failed\n    {e}')
+                continue
+            if status['status'] in TERMINAL_STATUSES:
+                self._resolve(order['orderId'], self._fill_from_status(status))
+
+    def _resolve(self, order_id: int, fill: Fill):
+        with self._lock:
+            future = self._pending.pop(order_id, None)
+            self._reports.pop(order_id, None)
+        if future is not None and not future.done():
+            future.set_result(fill)
+
+    def _on_execution_report(self, event: Dict):
+        now = self.clock.time()
+        with self._lock:
+            self._expire_reports(now)
+            report = self._reports.setdefault(
+                event['i'], {'commission': 0.0, 'commission_asset': ''})
+            report['status'] = event['X']
+            report['quantity'] = float(event['z'])
+            report['quote_quantity'] = float(event['Z'])
+            report['commission'] += float(event['n'])
+            report['commission_asset'] = event['N'] or report['commission_asset']
+            report['updated'] = now
+            tracked = event['i'] in self._pending
+            if tracked and event['X'] in TERMINAL_STATUSES:
+                fill = self._fill_from_report(self._reports.pop(event['i']))
+
+        if tracked and event['X'] in TERMINAL_STATUSES:
+            self._resolve(event['i'], fill)
+
+    def _expire_reports(self, now: float):
+        """Drop the reports of untracked orders idle for over report_ttl"""
+        expired = [order_id for order_id, report in self._reports.items()
+                   if now - report['updated'] > self.report_ttl
+                   and order_id not in self._pending]
+        for order_id in expired:
+            del self._reports[order_id]
+
+    @staticmethod
+    def _fill_from_response(order: Dict) -> Fill:
+        fills = order.get('fills', [])
+        return Fill(status=order['status'],
+                    quantity=float(order['executedQty']),
+                    price=_average_price(order['cummulativeQuoteQty'],
+                                         order['executedQty']),
+                    commission=sum(float(fill['commission']) for fill in fills),
+                    commission_asset=fills[0]['commissionAsset'] if fills else '')
+
+    def _fill_from_status(self, status: Dict) -> Fill:
+        trades = self.client.get_my_trades(symbol=status['symbol'],
+                                           orderId=status['orderId'])
+        return Fill(status=status['status'],
+                    quantity=float(status['executedQty']),
+                    price=_average_price(status['cummulativeQuoteQty'],
+                                         status['executedQty']),
+                    commission=sum(float(trade['commission']) for trade in trades),
+                    commission_asset=trades[0]['commissionAsset'] if trades else '')
+
+    @staticmethod
+    def _fill_from_report(report: Dict) -> Fill:
+        return Fill(status=report['status'],
+                    quantity=report['quantity'],
+                    price=_average_price(report['quote_quantity'],
+                                         report['quantity']),
+                    commission=report['commission'],
+                    commission_asset=report['commission_asset'])
+
+
+def _average_price(quote_quantity, quantity) -> float:
+    quantity = float(quantity)
+    return float(quote_quantity) / quantity if quantity else 0.0
@@ -0,0 +1,39 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+class Ranking:
+    """
+    Deltas (%) of a set of symbols against their average snapshot, computed in
+    a single vectorized pass.
+    """
+
+    def __init__(self, symbols: List[str], prices: np.ndarray,
+                 averages: np.ndarray):
+        self.symbols = symbols
+        self.deltas = (prices - averages) / averages * 100
+        self._order = None
+
+    @property
+    def order(self) -> np.ndarray:
+        """Indices of the symbols sorted by delta, largest fall first"""
+        if self._order is None:
+            self._order = np.argsort(self.deltas, kind='stable')
+        return self._order
+
+    def max_fall(self) -> Tuple[str, float]:
+        i = int(np.argmin(self.deltas))
+        return self.symbols[i], float(self.deltas[i])
+
+    def max_rise(self) -> Tuple[str, float]:
+        i = int(np.argmax(self.deltas))
+        return self.symbols[i], float(self.deltas[i])
+
+    def top_falls(self, k: int) -> List[Tuple[str, float]]:
+        return [(self.symbols[i], float(self.deltas[i]))
+                for i in self.order[:k]]
+
+    def top_rises(self, k: int) -> List[Tuple[str, float]]:
+        return [(self.symbols[i], float(self.deltas[i]))
+                for i in self.order[::-1][:k]]
@@ -0,0 +1,305 @@
+"""
+Drop-in stand-in for the python-binance Client, serving replayed or synthetic
+prices and filling market orders deterministically, with no credentials or
+network. Used by the backtester, the benchmarks and anywhere the bot has to
+run at full speed.
+"""
+import functools
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from binance.exceptions import BinanceAPIException
+
+from clock import VirtualClock
+
+DAY = 86400
+
+
+class ReplayFinished(Exception):
+    """Raised when prices are requested past the end of the replay"""
+
+
+class SimulatedAPIError(BinanceAPIException):
+    """
+    Rejected request, carrying the Binance error code it stands in for and
+    caught wherever the client's BinanceAPIException is
+    """
+
+    def __init__(self, code: int, message: str):
+        super().__init__(None, 400, json.dumps({'code': code, 'msg': message}))
+
+
+class Trade(NamedTuple):
+    timestamp: float
+    side: str
+    symbol: str
+    quantity: float
+    price: float
+    commission: float
+    commission_asset: str
+
+
+def _api_call(method):
+    """Count and time every call, then charge the simulated latency"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        self.calls[method.__name__] += 1
+        try:
+            if self.latency:
+                self.clock.sleep(self.latency)
+            return method(self, *args, **kwargs)
+        finally:
+            self.call_time[method.__name__] += time.perf_counter() - start
+    return wrapper
+
+
+class SimulatedClient:
+    """
+    Serve (timestamps x pairs) prices and 24hr changes on the clock's timeline.
+    A ticker request for a pair already served at the current tick moves to
+    the next recorded tick (skipping ticks slept over), so an all-symbol
+    ticker, or the chunks of a multi-symbol one, fetch one tick each. Past
+    the last tick ReplayFinished is raised; every other request sees the
+    current tick.
+
+    Market orders fill in full at the current price, moved against the order
+    by slippage, and pay fee on the received asset, as Binance does without
+    BNB discounts. A BUY the slipped price makes unaffordable fills what the
+    quote balance pays for. calls and call_time count the requests and wall time spent
+    per method, latency adds simulated seconds to the clock on every request.
+    """
+
+    def __init__(self, pairs: Sequence[str], prices: np.ndarray,
+                 changes: Optional[np.ndarray] = None,
+                 timestamps: Optional[np.ndarray] = None,
+                 clock: VirtualClock = None,
+                 balances: Optional[Dict[str, float]] = None,
+                 fee: float = 0.001, slippage: float = 0.0,
+                 latency: float = 0.0, quote: str = 'USDT',
+                 step_size: str = '0.00000100', tick_size: str = '0.00000100',
+                 min_notional: float = 0.0, interval: float = 60):
+        self.pairs = list(pairs)
+        self.index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.prices = prices
+        self.changes = changes if changes is not None \
+            else daily_changes(prices, interval)
+        self.timestamps = timestamps if timestamps is not None \
+            else np.arange(len(prices)) * float(interval)
+        self.clock = clock if clock is not None \
+            else VirtualClock(float(self.timestamps[0]))
+        self.balances = dict(balances) if balances is not None \
+            else {quote: 1000.0}
+
+        self.fee = fee
+        self.slippage = slippage
+        self.latency = latency
+        self.quote = quote
+        self.step_size = step_size
+        self.tick_size = tick_size
+        self.min_notional = min_notional
+
+        self.calls = Counter()
+        self.call_time = defaultdict(float)
+
+        self.cursor = -1
+        # Tickers served at the current tick, None once it is spent
+        self._served = None
+        self._lock = threading.RLock()
+        self.trades: List[Trade] = []
+        self.equity: List[tuple] = []
+        self._orders: Dict[int, Dict] = {}
+
+        self.advance()
+
+    @classmethod
+    def synthetic(cls, pairs: Sequence[str], ticks: int, interval: float = 60,
+                  start: float = 0.0, volatility: float = 0.002, seed: int = 0,
+                  **kwargs) -> 'SimulatedClient':
+        """Serve a seeded geometric random walk of every pair"""
+        prices, timestamps = random_walk(len(pairs), ticks, interval, start,
+                                         volatility, seed)
+        return cls(pairs, prices, timestamps=timestamps, interval=interval,
+                   **kwargs)
+
+    # Replay
+    def advance(self):
+        """Move to the next tick, or the latest one the clock has passed"""
+        cursor = max(self.cursor + 1,
+                     int(np.searchsorted(self.timestamps, self.clock.time())))
+        if cursor >= len(self.timestamps):
+            raise ReplayFinished()
+        self.cursor = cursor
+        self.clock.advance_to(float(self.timestamps[cursor]))
+        self.equity.append((self.clock.time(), self.value()))
+
+    def price(self, pair: str) -> float:
+        return float(self.prices[self.cursor, self.index[pair]])
+
+    def value(self) -> float:
+        """Worth of every balance in the quote asset at the current tick"""
+        value = self.balances.get(self.quote, 0.0)
+        for asset, balance in self.balances.items():
+            if asset != self.quote and balance:
+                value += balance * self.price(asset + self.quote)
+        return value
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.call_time.clear()
+
+    # Market data
+    def _serve(self, keys):
+        """Move to the next tick when any of keys was served at this one"""
+        with self._lock:
+            if self._served is None or not self._served.isdisjoint(keys):
+                self.advance()
+                self._served = set()
+            self._served.update(keys)
+
+    @_api_call
+    def get_ticker(self, symbol: str = None, symbols: str = None):
+        if symbol is not None:
+            if symbol not in self.index:
+                raise SimulatedAPIError(-1121, 'Invalid symbol.')
+            with self._lock:
+                self._serve([symbol])
+                return self._ticker(symbol)
+        pairs = self.pairs if symbols is None else json.loads(symbols)
+        for pair in pairs:
+            if pair not in self.index:
+                raise SimulatedAPIError(-1121, 'Invalid symbol.')
+        self._serve(pairs)
+        return [self._ticker(pair) for pair in pairs]
+
+    def _ticker(self, pair: str) -> Dict:
+        i = self.index[pair]
+        return {'symbol': pair,
+                'lastPrice': repr(float(self.prices[self.cursor, i])),
+                'priceChangePercent': repr(float(self.changes[self.cursor, i]))}
+
+    @_api_call
+    def get_symbol_ticker(self, symbol: str) -> Dict:
+        return {'symbol': symbol, 'price': repr(self.price(symbol))}
+
+    @_api_call
+    def get_exchange_info(self) -> Dict:
+        return {'symbols': [self._symbol_info(pair) for pair in self.pairs]}
+
+    @_api_call
+    def get_symbol_info(self, symbol: str) -> Optional[Dict]:
+        return self._symbol_info(symbol) if symbol in self.index else None
+
+    def _symbol_info(self, pair: str) -> Dict:
+        return {'symbol': pair, 'status': 'TRADING',
+                'baseAsset': pair[:-len(self.quote)], 'quoteAsset': self.quote,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'tickSize': self.tick_size},
+                    {'filterType': 'LOT_SIZE', 'stepSize': self.step_size},
+                    {'filterType': 'NOTIONAL',
+                     'minNotional': repr(self.min_notional)}]}
+
+    # Account
+    @_api_call
+    def get_account(self) -> Dict:
+        return {'balances': [{'asset': asset, 'free': repr(balance), 'locked': '0'}
+                             for asset, balance in self.balances.items()]}
+
+    @_api_call
+    def get_asset_balance(self, asset: str) -> Dict:
+        return {'asset': asset, 'free': repr(self.balances.get(asset, 0.0)),
+                'locked': '0'}
+
+    # Orders
+    @_api_call
+    def order_market_buy(self, symbol: str, quantity: float) -> Dict:
+        return self._order(symbol, 'BUY', quantity)
+
+    @_api_call
+    def order_market_sell(self, symbol: str, quantity: float) -> Dict:
+        return self._order(symbol, 'SELL', quantity)
+
+    @_api_call
+    def get_order(self, symbol: str, orderId: int) -> Dict:
+        order = dict(self._orders[orderId])
+        del order['fills']
+        return order
+
+    @_api_call
+    def get_my_trades(self, symbol: str, orderId: int = None) -> List[Dict]:
+        orders = [self._orders[orderId]] if orderId is not None else \
+            [order for order in self._orders.values() if order['symbol'] == symbol]
+        return [dict(fill, symbol=order['symbol'], orderId=order['orderId'])
+                for order in orders for fill in order['fills']]
+
+    def _order(self, symbol: str, side: str, quantity: float) -> Dict:
+        if symbol not in self.index:
+            raise SimulatedAPIError(-1121, 'Invalid symbol.')
+        if quantity <= 0:
+            raise SimulatedAPIError(-1013, 'Filter failure: LOT_SIZE')
+
+        base = symbol[:-len(self.quote)]
+        price = self.price(symbol) * \
+            (1 + self.slippage if side == 'BUY' else 1 - self.slippage)
+        cost = quantity * price
+        if cost < self.min_notional:
+            raise SimulatedAPIError(-1013, 'Filter failure: NOTIONAL')
+
+        if side == 'BUY':
+            balance = self.balances.get(self.quote, 0.0)
+            if cost > balance and self.slippage:
+                # Sized at the ticker price, the order only falls short by
+                # the slippage: fill what the balance pays for instead
+                step = float(self.step_size)
+                quantity = math.floor(balance / price / step) * step
+                cost = quantity * price
+            if cost > balance or quantity <= 0:
+                raise SimulatedAPIError(
+                    -2010, 'Account has insufficient balance for requested action.')
+            commission, commission_asset = quantity * self.fee, base
+            self.balances[self.quote] -= cost
+            self.balances[base] = \
+                self.balances.get(base, 0.0) + quantity - commission
+        else:
+            if quantity > self.balances.get(base, 0.0):
+                raise SimulatedAPIError(
+                    -2010, 'Account has insufficient balance for requested action.')
+            commission, commission_asset = cost * self.fee, self.quote
+            self.balances[base] -= quantity
+            self.balances[self.quote] = \
+                self.balances.get(self.quote, 0.0) + cost - commission
+
+        self.trades.append(Trade(self.clock.time(), side, symbol, quantity,
+                                 price, commission, commission_asset))
+        order = {'symbol': symbol, 'orderId': len(self._orders) + 1,
+                 'side': side, 'type': 'MARKET', 'status': 'FILLED',
+                 'transactTime': int(self.clock.time() * 1000),
+                 'origQty': repr(quantity), 'executedQty': repr(quantity),
+                 'cummulativeQuoteQty': repr(cost),
+                 'fills': [{'price': repr(price), 'qty': repr(quantity),
+                            'commission': repr(commission),
+                            'commissionAsset': commission_asset}]}
+        self._orders[order['orderId']] = order
+        return order
+
+
+def random_walk(symbols: int, ticks: int, interval: float = 60,
+                start: float = 0.0, volatility: float = 0.002, seed: int = 0):
+    """(ticks x symbols) seeded geometric random walk prices and timestamps"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, volatility, (ticks, symbols))
+    prices = rng.uniform(1, 100, symbols) * np.exp(np.cumsum(steps, axis=0))
+    return prices, start + np.arange(ticks) * float(interval)
+
+
+def daily_changes(prices: np.ndarray, interval: float = 60) -> np.ndarray:
+    """24hr change % of every tick, against the first tick within the day"""
+    lag = max(int(round(DAY / interval)), 1)
+    reference = np.concatenate(
+        [np.repeat(prices[:1], min(lag, len(prices)), axis=0), prices[:-lag]])
+    return (prices - reference) / reference * 100
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class SnapshotRing:
+    """
+    Fixed-size ring buffer of price snapshots (time x symbol x {price, 24hr %}).
+
+    The average snapshot is summed oldest first on every push, as the per-coin
+    mean over the queue did, and so are the latest-window sums of every size:
+    running sums drift from them by a few ulps, enough to flip price > average
+    for a price that has not moved. Pushes come once per snapshot interval,
+    reads on every tick.
+    """
+
+    def __init__(self, symbol_count: int, capacity: int):
+        self.capacity = capacity
+
+        self.data = np.zeros((capacity, symbol_count, 2))
+        self.timestamps = np.zeros(capacity)
+        self.sums = np.zeros((symbol_count, 2))
+        # latest_sums[n - 1] sums the prices of the latest n snapshots
+        self.latest_sums = np.zeros((capacity, symbol_count))
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def push(self, row: np.ndarray, timestamp: float):
+        """Enqueue a (symbol x {price, 24hr %}) row indexed by symbol id"""
+        slot = self.count % self.capacity
+
+        self.data[slot] = row
+        self.timestamps[slot] = timestamp
+        self.count += 1
+
+        first = self.count - len(self)
+        self.sums = self.data[first % self.capacity].copy()
+        for i in range(first + 1, self.count):
+            self.sums += self.data[i % self.capacity]
+
+        # cumsum adds one snapshot at a time, newest first
+        newest_first = np.arange(self.count - 1, first - 1, -1) % self.capacity
+        np.cumsum(self.data[newest_first, :, 0], axis=0,
+                  out=self.latest_sums[:len(self)])
+
+    def average(self) -> np.ndarray:
+        return self.sums / len(self)
+
+    def latest_average(self, n: int) -> np.ndarray:
+        """
+        Return the average price of the latest n snapshots (at most len(self))
+        in O(symbols). The windows are summed newest first on push, as the
+        per-coin mean did: a difference of prefix sums is off by a few ulps,
+        enough to flip price > average whenever the price has not moved.
+        """
+        n = int(min(n, len(self)))
+        return self.latest_sums[n - 1] / n
+
+    def latest(self, n: int) -> np.ndarray:
+        """Return the latest n snapshots (at most len(self)), oldest first"""
+        n = min(n, len(self))
+        slots = np.arange(self.count - n, self.count) % self.capacity
+        return self.data[slots]
+
+    @property
+    def oldest_timestamp(self) -> float:
+        return float(self.timestamps[(self.count - len(self)) % self.capacity])
+
+    @property
+    def latest_timestamp(self) -> float:
+        return float(self.timestamps[(self.count - 1) % self.capacity])
@@ -1,7 +1,37 @@
-from typing import Dict, Tuple
+import bisect
+import itertools
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Composite strategy parameters and their dtype in StrategyTable.params
+PARAMETERS = [('snapshot_refresh_rate', 'f8'),
+              ('latest_snapshot_count', 'i8'),
+              ('cf_delta_threshold', 'f8'),
+              ('cf_rebound_ratio', 'f8'),
+              ('fc_delta_threshold', 'f8'),
+              ('fc_rebound_ratio', 'f8'),
+              ('rebound_wait_time', 'f8'),
+              ('trading_cooldown_time', 'f8'),
+              ('suspension_threshold', 'f8'),
+              ('suspension_time', 'f8'),
+              ('profit_retention_activation_positive', 'f8'),
+              ('profit_retention_activation_negative', 'f8'),
+              ('sell_confirmation_repetition', 'i8'),
+              ('sell_confirmation_time', 'f8'),
+              ('buy_confirmation_repetition', 'i8'),
+              ('buy_confirmation_time', 'f8')]
+
+COMPONENTS = ('BASELINE', '24HR', 'LATEST', 'INVERSION')
+
+# Indicator range each component's activation intervals must cover
+DOMAINS = {'BASELINE': (0, 1), '24HR': (0, 1), 'LATEST': (0, 1),
+           'INVERSION': (-1, 1)}
 
 
 class Strategy:
+    __slots__ = ('name', 'interval') + tuple(name for name, _ in PARAMETERS)
+
     def __init__(self, baseline, multiplier_24hr, multiplier_latest, trend_inversion):
         # Identity Configuration
         self.name = {'BASELINE': baseline.name, '24HR': multiplier_24hr.name,
@@ -92,6 +122,91 @@ class Strategy:
                                       trend_inversion.buy_confirmation_time)
 
 
+class RegimeSelector:
+    """
+    Resolve an indicator value to the index of the strategy component whose
+    activation interval contains it, with a binary search.
+
+    The intervals are validated on construction: sorted, contiguous (neither
+    overlapping nor leaving gaps) and covering the whole domain. A value on a
+    shared bound resolves to the lower interval, as with a linear scan.
+    """
+
+    def __init__(self, components: List, domain: Tuple[float, float]):
+        names = [component.name for component in components]
+        intervals = [component.interval for component in components]
+
+        if intervals[0][0] != domain[0] or intervals[-1][1] != domain[1]:
+            raise ValueError(f'Activation intervals of {names} do not cover '
+                             f'{list(domain)}: {intervals}')
+        for (name, (low, high)), (next_name, (next_low, _)) in \
+                zip(zip(names, intervals), zip(names[1:], intervals[1:])):
+            if next_low < high:
+                raise ValueError(f'Activation intervals of {name} and '
+                                 f'{next_name} overlap: {intervals}')
+            if next_low > high:
+                raise ValueError(f'Activation intervals of {name} and '
+                                 f'{next_name} leave a gap: {intervals}')
+        if any(low >= high for low, high in intervals):
+            raise ValueError(f'Empty activation interval in {names}: {intervals}')
+
+        self.lower = domain[0]
+        self.upper_bounds = [high for _, high in intervals]
+        self._scaled = {}
+
+    def select(self, value: float, scale: float = 1) -> Optional[int]:
+        """
+        Return the index of the interval containing value / scale, or None when
+        out of the domain. Bounds are scaled rather than the value divided, so
+        counts compare exactly as cardinality * interval did.
+        """
+        if scale not in self._scaled:
+            self._scaled[scale] = (scale * self.lower,
+                                   [scale * bound for bound in self.upper_bounds])
+        lower, upper_bounds = self._scaled[scale]
+
+        if not lower <= value <= upper_bounds[-1]:
+            return None
+        return bisect.bisect_left(upper_bounds, value)
+
+
+class StrategyTable:
+    """
+    Every composite Strategy of a strategy configuration, precomputed at
+    startup and indexed by the (BASELINE, 24HR, LATEST, INVERSION) component
+    indices, along with the RegimeSelector of every component. params holds
+    the same parameters as a structured array of that shape for batch
+    evaluation.
+    """
+
+    def __init__(self, strategy_configuration: Dict):
+        components = [strategy_configuration[component]
+                      for component in COMPONENTS]
+        self.shape = tuple(len(component) for component in components)
+
+        self.selectors = {component: RegimeSelector(
+            strategy_configuration[component], DOMAINS[component])
+            for component in COMPONENTS}
+
+        # Flattened in C order, see __getitem__
+        self.strategies = [Strategy(*combination)
+                           for combination in itertools.product(*components)]
+
+        self.params = np.array(
+            [tuple(getattr(strategy, name) for name, _ in PARAMETERS)
+             for strategy in self.strategies],
+            dtype=PARAMETERS).reshape(self.shape)
+
+    def __len__(self) -> int:
+        return len(self.strategies)
+
+    def __getitem__(self, index: Sequence[int]) -> Strategy:
+        baseline, m24hr, mlatest, inversion = index
+        return self.strategies[
+            ((baseline * self.shape[1] + m24hr) * self.shape[2] + mlatest) *
+            self.shape[3] + inversion]
+
+
 class Strategy_Baseline:
     def __init__(self,
                  identity: Dict,
@@ -0,0 +1,55 @@
+import heapq
+from typing import Dict, List, Tuple
+
+
+class SuspensionManager:
+    """
+    Suspended symbols in a min-heap ordered by expiry.
+
+    Every suspension lasts the same (strategy dependent) suspension_time, so
+    ordering by expiry is ordering by suspension start. The heap is keyed by
+    start time and expiries are derived from the suspension_time passed in at
+    release, which keeps them correct when the active strategy changes it.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self._entries: Dict[int, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, symbol: int) -> bool:
+        return symbol in self._entries
+
+    def suspend(self, symbol: int, start: float, price: float):
+        self._entries[symbol] = start, price
+        heapq.heappush(self._heap, (start, symbol))
+
+    def unsuspend(self, symbol: int):
+        # The heap entry is discarded lazily once it reaches the top
+        del self._entries[symbol]
+
+    def release_expired(self, now: float, suspension_time: float) -> List[int]:
+        """Unsuspend and return every symbol suspended for over suspension_time"""
+        released = []
+        self._discard_stale()
+        while self._heap and now - self._heap[0][0] > suspension_time:
+            released.append(heapq.heappop(self._heap)[1])
+            del self._entries[released[-1]]
+            self._discard_stale()
+        return released
+
+    def release_all(self) -> List[int]:
+        released = [symbol for start, symbol in sorted(self._heap)
+                    if self._is_live(start, symbol)]
+        self._heap.clear()
+        self._entries.clear()
+        return released
+
+    def _is_live(self, start: float, symbol: int) -> bool:
+        return symbol in self._entries and self._entries[symbol][0] == start
+
+    def _discard_stale(self):
+        while self._heap and not self._is_live(*self._heap[0]):
+            heapq.heappop(self._heap)
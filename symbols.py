@@ -0,0 +1,50 @@
+import sys
+from typing import Iterable, List
+
+
+class SymbolTable:
+    """
+    Registry assigning every (base, quote) pair a dense integer id, so prices,
+    snapshots and suspensions can be stored in arrays indexed by id.
+    """
+
+    def __init__(self, pairs: Iterable[str] = (), quote: str = 'USDT'):
+        self.quote = quote
+        self.pairs: List[str] = []
+        self.bases: List[str] = []
+        self._ids = {}
+
+        for pair in pairs:
+            self.register(pair)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def register(self, pair: str) -> int:
+        """Register a pair quoted in self.quote and return its id"""
+        if pair in self._ids:
+            return self._ids[pair]
+        if not pair.endswith(self.quote):
+            raise ValueError(f'{pair} is not quoted in {self.quote}')
+
+        id_ = len(self.pairs)
+        pair = sys.intern(pair)
+        base = sys.intern(pair[:-len(self.quote)])
+        self.pairs.append(pair)
+        self.bases.append(base)
+        self._ids[pair] = id_
+        self._ids[base] = id_
+        return id_
+
+    def id(self, name: str) -> int:
+        """Return the id of a pair ('BTCUSDT') or of its base asset ('BTC')"""
+        return self._ids[name]
+
+    def pair(self, id_: int) -> str:
+        return self.pairs[id_]
+
+    def base(self, id_: int) -> str:
+        return self.bases[id_]
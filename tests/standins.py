@@ -0,0 +1,220 @@
+"""
+Local stand-ins for the Binance endpoints, so the network code can be tested
+offline through its configurable base URLs.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+MINUTE = 60000
+
+
+def kline_close(pair: str, open_time: int) -> float:
+    """Deterministic close of the kline of pair opened at open_time (ms)"""
+    return 100 + sum(map(ord, pair)) % 50 + open_time // MINUTE % 97 / 10
+
+
+class KlineStandIn:
+    """
+    Serve paged 1m klines of any pair up to now (ms) on GET /api/v3/klines.
+    Every rate_limit_every-th request is answered 429 with a Retry-After, and
+    every response reports the weight used so far in X-MBX-USED-WEIGHT-1M.
+    """
+
+    def __init__(self, now: int, rate_limit_every: int = 0,
+                 retry_after: float = 0.05, weight: int = 5):
+        self.now = now
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.weight = weight
+        self.requests = 0
+        self.rate_limited = 0
+        self.used_weight = 0
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stand_in._handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        url = urlparse(request.path)
+        if url.path != '/api/v3/klines':
+            request.send_response(404)
+            request.end_headers()
+            return
+
+        with self._lock:
+            self.requests += 1
+            limited = self.rate_limit_every and \
+                self.requests % self.rate_limit_every == 0
+            if limited:
+                self.rate_limited += 1
+            else:
+                self.used_weight += self.weight
+            used = self.used_weight
+        if limited:
+            request.send_response(429)
+            request.send_header('Retry-After', str(self.retry_after))
+            request.end_headers()
+            return
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        pair = query['symbol']
+        since = -(-int(query.get('startTime', 0)) // MINUTE) * MINUTE
+        until = min(int(query.get('endTime', self.now)), self.now)
+        limit = int(query.get('limit', 500))
+        rows = []
+        for open_time in range(since, until + 1, MINUTE):
+            if len(rows) == limit:
+                break
+            close = kline_close(pair, open_time)
+            rows.append([open_time, f'{close:.2f}', f'{close + 1:.2f}',
+                         f'{close - 1:.2f}', f'{close:.2f}', '1.5',
+                         open_time + MINUTE - 1, '150.0', 10, '0', '0', '0'])
+
+        body = json.dumps(rows).encode()
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('X-MBX-USED-WEIGHT-1M', str(used))
+        request.end_headers()
+        request.wfile.write(body)
+
+
+class StreamStandIn:
+    """
+    WebSocket server pushing the events given to send to every connected
+    client, on any path (e.g. /stream?streams=... or /ws/<listen key>).
+    paths records the path of every connection.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self._connections = set()
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,),
+                                        daemon=True)
+        self._thread.start()
+        ready.wait(5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(self._serve())
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f'ws://127.0.0.1:{port}'
+        ready.set()
+        self._loop.run_forever()
+
+    async def _serve(self):
+        return await websockets.serve(self._handler, '127.0.0.1', 0)
+
+    async def _handler(self, connection):
+        self.paths.append(connection.request.path)
+        self._connections.add(connection)
+        try:
+            await connection.wait_closed()
+        finally:
+            self._connections.discard(connection)
+
+    def wait_connected(self, count: int = 1, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while len(self._connections) < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError('No client connected')
+            time.sleep(0.01)
+
+    def send(self, event: dict, stream: str = None):
+        """Push event, wrapped as a combined-stream message when stream is given"""
+        message = json.dumps(event if stream is None
+                             else {'stream': stream, 'data': event})
+        asyncio.run_coroutine_threadsafe(self._broadcast(message),
+                                         self._loop).result(5)
+
+    async def _broadcast(self, message: str):
+        for connection in list(self._connections):
+            await connection.send(message)
+
+    def disconnect(self):
+        """Drop every client, as a server restart would"""
+        async def close_all():
+            for connection in list(self._connections):
+                await connection.close()
+        asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(5)
+
+    def close(self):
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+
+def ticker_event(pair: str, price: float, change: float) -> dict:
+    """24hr ticker stream event of pair"""
+    return {'e': '24hrTicker', 's': pair, 'c': repr(price), 'P': repr(change)}
+
+
+class UserDataClient:
+    """
+    REST side of the user-data stream: numbered listen keys, keepalives that
+    fail while fail_keepalives is positive, and the account's balances.
+    threads records the thread of every listen key request.
+    """
+
+    def __init__(self, balances: dict = None, fail_keepalives: int = 0):
+        self.balances = dict(balances or {'USDT': 100.0})
+        self.fail_keepalives = fail_keepalives
+        self.listen_keys = 0
+        self.keepalives = []
+        self.threads = []
+
+    def stream_get_listen_key(self) -> str:
+        self.threads.append(threading.current_thread())
+        self.listen_keys += 1
+        return f'key-{self.listen_keys}'
+
+    def stream_keepalive(self, listenKey: str):
+        self.threads.append(threading.current_thread())
+        if self.fail_keepalives > 0:
+            self.fail_keepalives -= 1
+            raise ConnectionError('keepalive refused')
+        self.keepalives.append(listenKey)
+
+    def get_account(self) -> dict:
+        return {'balances': [{'asset': asset, 'free': repr(free), 'locked': '0'}
+                             for asset, free in self.balances.items()]}
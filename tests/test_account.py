@@ -0,0 +1,52 @@
+import time
+
+from account import AccountState, UserDataStream
+from standins import StreamStandIn, UserDataClient
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_stream_updates_balances():
+    client = UserDataClient({'USDT': 100.0})
+    with StreamStandIn() as stand_in:
+        stream = UserDataStream(client, url=stand_in.url)
+        account = AccountState(client, stream)
+        stream.start()
+        try:
+            stand_in.wait_connected()
+            assert stand_in.paths == ['/ws/key-1']
+            # The listen key is requested off the stream's event loop
+            assert stream._thread not in client.threads
+
+            stand_in.send({'e': 'outboundAccountPosition',
+                           'B': [{'a': 'BTC', 'f': '0.5', 'l': '0'}]})
+            stand_in.send({'e': 'balanceUpdate', 'a': 'USDT', 'd': '-40'})
+            wait_until(lambda: account.free('USDT') == 60.0)
+            assert account.free('BTC') == 0.5
+        finally:
+            stream.stop()
+
+
+def test_keepalive_survives_failures_and_reconnects():
+    client = UserDataClient(fail_keepalives=2)
+    with StreamStandIn() as stand_in:
+        stream = UserDataStream(client, url=stand_in.url,
+                                keepalive_interval=0.02, reconnect_delay=0.01)
+        stream.start()
+        try:
+            stand_in.wait_connected()
+            wait_until(lambda: client.keepalives)
+            assert client.keepalives[0] == 'key-1'
+
+            # A new connection gets a new listen key, kept alive in turn
+            stand_in.disconnect()
+            wait_until(lambda: 'key-2' in client.keepalives)
+            assert stand_in.paths == ['/ws/key-1', '/ws/key-2']
+            assert stream._thread not in client.threads
+        finally:
+            stream.stop()
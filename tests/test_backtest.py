@@ -0,0 +1,22 @@
+from backtest import run_backtest
+from configuration import STRATEGY_CONFIGURATION
+from sim_client import daily_changes, random_walk
+
+PAIRS = [f'S{i:02d}USDT' for i in range(8)]
+
+
+def replay(seed=0, ticks=1500, interval=300):
+    """A seeded market volatile enough to trade on a short snapshot queue"""
+    prices, timestamps = random_walk(len(PAIRS), ticks, interval,
+                                     volatility=0.005, seed=seed)
+    return PAIRS, timestamps, prices, daily_changes(prices, interval)
+
+
+def test_backtest_with_slippage_buys():
+    result = run_backtest(STRATEGY_CONFIGURATION, *replay(), slippage=0.001,
+                          snapshot_queue_size=12)
+    buys = [trade for trade in result.trades if trade.side == 'BUY']
+    assert buys
+    # Every order filled at once, none was rejected and retried
+    assert len(result.trades) - len(buys) in (len(buys) - 1, len(buys))
+    assert result.equity[:, 1].min() > 0
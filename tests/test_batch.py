@@ -0,0 +1,31 @@
+import itertools
+
+from backtest import run_backtest
+from batch import run_batch
+from configuration import STRATEGY_CONFIGURATION
+from optimizer import Parameter, configure
+from test_backtest import PAIRS, replay
+
+
+def test_batch_trades_as_the_bot():
+    parameters = [Parameter.parse('BASELINE.fc_delta_threshold=2,3'),
+                  Parameter.parse('24HR.cf_rebound_ratio=0.5,1', scale=True)]
+    configurations = [configure(STRATEGY_CONFIGURATION, parameters, values)
+                      for values in itertools.product(
+                          *(parameter.values for parameter in parameters))]
+
+    for seed in (0, 2):
+        timestamps, prices, changes = replay(seed)[1:]
+        batch = run_batch(configurations, timestamps, prices, changes,
+                          snapshot_queue_size=12)
+        for i, configuration in enumerate(configurations):
+            expected = [(trade.timestamp, trade.side, PAIRS.index(trade.symbol),
+                         trade.quantity, trade.price)
+                        for trade in run_backtest(configuration, PAIRS,
+                                                  timestamps, prices, changes,
+                                                  snapshot_queue_size=12).trades]
+            trades = batch.trades[batch.trades['configuration'] == i]
+            actual = [(trade['timestamp'], trade['side'], trade['symbol'],
+                       trade['quantity'], trade['price']) for trade in trades]
+            assert expected, (seed, i)
+            assert actual == expected, (seed, i)
@@ -0,0 +1,72 @@
+from account import AccountState
+from bot import Bot
+from bucket import Bucket
+from clock import VirtualClock
+from configuration import STRATEGY_CONFIGURATION
+from exchange_info import ExchangeInfo
+from orders import OrderTracker
+from sim_client import SimulatedClient
+
+PAIRS = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+
+
+class NewOrderClient(SimulatedClient):
+    """Market orders are accepted but stay NEW until a report resolves them"""
+
+    def _order(self, symbol: str, side: str, quantity: float):
+        order = {'symbol': symbol, 'orderId': len(self._orders) + 1,
+                 'side': side, 'type': 'MARKET', 'status': 'NEW',
+                 'origQty': repr(quantity), 'executedQty': '0',
+                 'cummulativeQuoteQty': '0', 'fills': []}
+        self._orders[order['orderId']] = order
+        return order
+
+
+def report(order_id, status, quantity, quote):
+    return {'e': 'executionReport', 'i': order_id, 'X': status,
+            'z': repr(quantity), 'Z': repr(quote), 'n': '0', 'N': None}
+
+
+def pending_bot():
+    clock = VirtualClock(0)
+    client = NewOrderClient.synthetic(PAIRS, 100, clock=clock)
+    bucket = Bucket(PAIRS, 3, client=client, clock=clock)
+    bot = Bot(STRATEGY_CONFIGURATION, bucket, 'USDT',
+              account=AccountState(client, clock=clock),
+              exchange_info=ExchangeInfo(client, bucket.symbols, path=None,
+                                         clock=clock),
+              orders=OrderTracker(client, initial_backoff=60, clock=clock),
+              order_timeout=0.01, client=client, clock=clock)
+
+    bot._hold('BBB', bot.buy('BBB'))
+    assert bot.current_holding == 'USDT'
+    assert bot.pending_order is not None
+    return bot, client
+
+
+def test_pending_order_switches_holding_once_filled():
+    bot, client = pending_bot()
+    assert bot._settle_order()
+    assert bot.current_holding == 'USDT'
+
+    order = bot.pending_order[1]
+    quantity = float(order['origQty'])
+    client.balances = {'USDT': 0.0, 'BBB': quantity}
+    bot.orders._on_execution_report(
+        report(order['orderId'], 'FILLED', quantity, 1000.0))
+
+    assert not bot._settle_order()
+    assert bot.pending_order is None
+    assert bot.current_holding == 'BBB'
+    assert bot.get_balance() == quantity
+
+
+def test_canceled_pending_order_keeps_holding():
+    bot, client = pending_bot()
+    order = bot.pending_order[1]
+    bot.orders._on_execution_report(report(order['orderId'], 'CANCELED', 0, 0))
+
+    assert not bot._settle_order()
+    assert bot.pending_order is None
+    assert bot.current_holding == 'USDT'
+    assert client.calls['order_market_buy'] == 1
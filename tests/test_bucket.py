@@ -0,0 +1,47 @@
+import numpy as np
+
+from bucket import Bucket
+from sim_client import SimulatedClient
+
+
+def test_bulk_prices_fetch_the_pairs_in_chunks():
+    pairs = [f'S{i:02d}USDT' for i in range(45)]
+    client = SimulatedClient.synthetic(pairs, 10)
+    bucket = Bucket(pairs, 10, client=client)
+    client.reset_counters()
+
+    for tick in range(2, 5):
+        prices = bucket.refresh(0)
+        # One tick per refresh, served by three requests of at most 20 pairs
+        assert client.cursor == tick
+        np.testing.assert_allclose(prices.vector[:, 0], client.prices[tick])
+    assert client.calls['get_ticker'] == 3 * 3
+
+
+def test_per_symbol_prices_fetch_one_tick_per_refresh():
+    pairs = [f'S{i:02d}USDT' for i in range(12)]
+    client = SimulatedClient.synthetic(pairs, 10)
+    bucket = Bucket(pairs, 10, bulk=False, max_concurrency=4, client=client)
+    client.reset_counters()
+
+    for tick in range(2, 5):
+        prices = bucket.refresh(0)
+        assert client.cursor == tick
+        np.testing.assert_allclose(prices.vector[:, 0], client.prices[tick])
+        np.testing.assert_allclose(prices.vector[:, 1], client.changes[tick])
+    assert client.calls['get_ticker'] == 3 * len(pairs)
+
+
+def test_rejected_bulk_ticker_falls_back_to_per_symbol():
+    pairs = [f'S{i:02d}USDT' for i in range(12)]
+    client = SimulatedClient.synthetic(pairs, 10)
+    bucket = Bucket(pairs, 10, client=client)
+    last = bucket.prices.vector[3].copy()
+
+    # Delisted: any request naming the pair is rejected with -1121
+    del client.index['S03USDT']
+    prices = bucket.refresh(0)
+    assert client.cursor == 2
+    np.testing.assert_allclose(np.delete(prices.vector[:, 0], 3),
+                               np.delete(client.prices[2], 3))
+    np.testing.assert_array_equal(prices.vector[3], last)
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from klines import COLUMNS, KlineDownloader, KlineStore
+from standins import KlineStandIn, kline_close
+
+T0 = 1_600_000_020  # on a minute
+PAIRS = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+
+
+def expected_closes(pair, start, end):
+    return [float(f'{kline_close(pair, t * 1000):.2f}')
+            for t in range(start, end - 60 + 1, 60)]
+
+
+def test_download_pages_and_rate_limits(tmp_path):
+    end = T0 + 2500 * 60
+    with KlineStandIn(end * 1000, rate_limit_every=4) as stand_in:
+        store = KlineStore(str(tmp_path))
+        downloader = KlineDownloader(store, stand_in.url, max_workers=3)
+        added = downloader.download(PAIRS, T0, end)
+
+        # 3 pages per pair, with every 4th request sent back
+        assert added == {pair: 2500 for pair in PAIRS}
+        assert stand_in.rate_limited > 0
+        assert downloader.limiter.used >= stand_in.used_weight
+    for pair in PAIRS:
+        rows = store.get(pair)
+        assert np.all(np.diff(rows['open_time']) == 60000)
+        assert list(rows['close']) == expected_closes(pair, T0, end)
+
+
+def test_resume_after_interrupted_append(tmp_path):
+    end = T0 + 1500 * 60
+    with KlineStandIn(end * 1000) as stand_in:
+        store = KlineStore(str(tmp_path))
+        downloader = KlineDownloader(store, stand_in.url)
+        downloader.download(PAIRS, T0, T0 + 600 * 60)
+
+        # An append interrupted after some columns, one of them mid-value
+        for column in list(COLUMNS)[:3]:
+            with open(store.path('AAAUSDT', column), 'ab') as f:
+                f.write(b'\x01' * 13)
+        assert store.length('AAAUSDT') == 600
+        assert len(store.column('AAAUSDT', 'open_time')) == 600
+
+        added = downloader.download(PAIRS, T0, end)
+        assert added == {pair: 900 for pair in PAIRS}
+
+    for pair in PAIRS:
+        for column, dtype in COLUMNS.items():
+            assert os.path.getsize(store.path(pair, column)) == \
+                1500 * np.dtype(dtype).itemsize
+        rows = store.get(pair)
+        assert np.all(np.diff(rows['open_time']) == 60000)
+        assert list(rows['close']) == expected_closes(pair, T0, end)
+
+    # The replay closes every kline, with the 24hr change against a day ago
+    pairs, timestamps, prices, changes = store.replay(PAIRS, T0 + 3600, end)
+    assert pairs == PAIRS
+    np.testing.assert_array_equal(timestamps, np.arange(T0 + 3660, end + 60, 60))
+    assert list(prices[:, 0]) == expected_closes('AAAUSDT', T0 + 3600, end)
+    assert changes.shape == prices.shape
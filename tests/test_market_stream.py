@@ -0,0 +1,70 @@
+import threading
+import time
+
+from bucket import Bucket
+from market_stream import MarketStream
+from sim_client import SimulatedClient
+from standins import StreamStandIn, ticker_event
+
+PAIRS = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+
+
+def live_bucket(max_staleness=1.0):
+    stream = MarketStream(PAIRS, max_staleness=max_staleness)
+    for pair in PAIRS:
+        stream.board.update(pair, 1.0, 0.5)
+    bucket = Bucket(PAIRS, 10, stream=stream,
+                    client=SimulatedClient.synthetic(PAIRS, 10))
+    return stream, bucket
+
+
+def test_forced_refresh_waits_for_board_update():
+    stream, bucket = live_bucket()
+    threading.Timer(0.1, stream.board.update, ('BBBUSDT', 2.0, 0.5)).start()
+
+    start = time.monotonic()
+    prices = bucket.refresh(0)
+    assert 0.05 < time.monotonic() - start < 0.9
+    assert tuple(prices.vector[bucket.symbols.id('BBB')]) == (2.0, 0.5)
+
+
+def test_forced_refresh_of_unchanged_board_blocks():
+    stream, bucket = live_bucket(max_staleness=0.3)
+
+    start = time.monotonic()
+    bucket.refresh(0)
+    # No update: waited until the board went stale instead of spinning
+    assert time.monotonic() - start >= 0.25
+    assert not stream.is_live()
+
+
+def test_stream_feeds_the_bucket_until_stale():
+    with StreamStandIn() as stand_in:
+        stream = MarketStream(PAIRS, url=stand_in.url, max_staleness=0.3).start()
+        try:
+            stand_in.wait_connected()
+            assert stand_in.paths == [
+                '/stream?streams=aaausdt@ticker/bbbusdt@ticker/cccusdt@ticker']
+            for i, pair in enumerate(PAIRS):
+                stand_in.send(ticker_event(pair, 10.0 + i, -1.5),
+                              f'{pair.lower()}@ticker')
+            deadline = time.monotonic() + 5
+            while not stream.is_live() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert stream.is_live()
+
+            client = SimulatedClient.synthetic(PAIRS, 10)
+            bucket = Bucket(PAIRS, 10, stream=stream, client=client)
+            assert tuple(bucket.prices.vector[bucket.symbols.id('BBB')]) == \
+                (11.0, -1.5)
+            assert client.calls['get_ticker'] == 0
+
+            # Silent past max_staleness, the bucket falls back to REST
+            time.sleep(0.35)
+            assert not stream.is_live()
+            prices = bucket.refresh(0)
+            assert client.calls['get_ticker'] == 1
+            assert prices.vector[bucket.symbols.id('BBB'), 0] == \
+                client.price('BBBUSDT')
+        finally:
+            stream.stop()
@@ -0,0 +1,19 @@
+import tempfile
+
+import numpy as np
+import pytest
+
+from configuration import STRATEGY_CONFIGURATION
+from optimizer import Parameter, sweep
+
+
+def test_sweep_rejects_unknown_objectives_before_running(monkeypatch):
+    def mkdtemp(*args, **kwargs):
+        raise AssertionError('sweep started before validating its objectives')
+    monkeypatch.setattr(tempfile, 'mkdtemp', mkdtemp)
+
+    parameters = [Parameter.parse('BASELINE.latest_snapshot_count=2,4')]
+    with pytest.raises(ValueError, match='Unknown objective'):
+        sweep(STRATEGY_CONFIGURATION, parameters, ['AAAUSDT'],
+              np.arange(3.0), np.ones((3, 1)), np.zeros((3, 1)),
+              objectives=['profit'])
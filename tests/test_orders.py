@@ -0,0 +1,70 @@
+import time
+
+from clock import VirtualClock
+from orders import OrderTracker
+
+
+class PendingClient:
+    """Orders stay NEW over REST, only the stream resolves them"""
+
+    def get_order(self, symbol, orderId):
+        return {'symbol': symbol, 'orderId': orderId, 'status': 'NEW'}
+
+
+def report(order_id, status, quantity, quote, commission):
+    return {'e': 'executionReport', 'i': order_id, 'X': status,
+            'z': repr(quantity), 'Z': repr(quote), 'n': repr(commission),
+            'N': 'BNB'}
+
+
+def order(order_id):
+    return {'symbol': 'BTCUSDT', 'orderId': order_id, 'status': 'NEW',
+            'executedQty': '0', 'cummulativeQuoteQty': '0'}
+
+
+def test_reports_before_tracking_keep_their_commission():
+    tracker = OrderTracker(PendingClient(), initial_backoff=60)
+    tracker._on_execution_report(report(1, 'PARTIALLY_FILLED', 1.0, 10.0, 0.01))
+
+    future = tracker.track(order(1))
+    assert not future.done()
+    tracker._on_execution_report(report(1, 'FILLED', 3.0, 33.0, 0.02))
+
+    fill = future.result(timeout=1)
+    assert fill.status == 'FILLED'
+    assert fill.quantity == 3.0 and fill.price == 11.0
+    assert abs(fill.commission - 0.03) < 1e-12
+    assert fill.commission_asset == 'BNB'
+    assert not tracker._reports
+
+
+def test_terminal_report_before_tracking_resolves_at_once():
+    tracker = OrderTracker(PendingClient())
+    tracker._on_execution_report(report(2, 'FILLED', 2.0, 20.0, 0.01))
+
+    fill = tracker.track(order(2)).result(timeout=0)
+    assert fill.quantity == 2.0 and fill.commission == 0.01
+    assert not tracker._reports
+
+
+def test_untracked_reports_expire():
+    clock = VirtualClock(0)
+    tracker = OrderTracker(PendingClient(), report_ttl=600, clock=clock)
+    for order_id in range(100):
+        tracker._on_execution_report(report(order_id, 'FILLED', 1.0, 1.0, 0.0))
+    assert len(tracker._reports) == 100
+
+    clock.advance_to(601)
+    tracker._on_execution_report(report(100, 'NEW', 0.0, 0.0, 0.0))
+    assert list(tracker._reports) == [100]
+
+
+def test_polling_leaves_simulated_time_alone():
+    clock = VirtualClock(0)
+    tracker = OrderTracker(PendingClient(), initial_backoff=0.01, clock=clock)
+    future = tracker.track(order(3))
+
+    time.sleep(0.1)
+    assert clock.time() == 0
+    tracker._on_execution_report(report(3, 'FILLED', 1.0, 1.0, 0.0))
+    assert future.result(timeout=1).status == 'FILLED'
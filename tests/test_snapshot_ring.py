@@ -0,0 +1,27 @@
+import numpy as np
+
+from snapshot_ring import SnapshotRing
+
+
+def test_averages_match_the_per_coin_means():
+    rng = np.random.default_rng(0)
+    # Prices on a 0.01 tick that mostly stand still, as on a quiet market
+    prices = np.round(rng.uniform(1, 100, 50), 2)
+    ring = SnapshotRing(50, 12)
+    queue = []
+    for timestamp in range(40):
+        prices = np.round(prices + rng.choice([-0.01, 0, 0, 0, 0.01], 50), 2)
+        changes = rng.uniform(-5, 5, 50)
+        row = np.stack([prices, changes], axis=1)
+        ring.push(row, timestamp)
+        queue = (queue + [row.tolist()])[-12:]
+
+        for coin in range(50):
+            column = [snapshot[coin] for snapshot in queue]
+            assert ring.average()[coin, 0] == \
+                sum(price for price, _ in column) / len(column)
+            assert ring.average()[coin, 1] == \
+                sum(change for _, change in column) / len(column)
+            for n in (1, 6, 12, 20):
+                window = [price for price, _ in column[::-1][:n]]
+                assert ring.latest_average(n)[coin] == sum(window) / len(window)
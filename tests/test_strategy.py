@@ -0,0 +1,89 @@
+from typing import NamedTuple, Tuple
+
+import numpy as np
+import pytest
+
+from configuration import STRATEGY_CONFIGURATION
+from strategy import (COMPONENTS, DOMAINS, PARAMETERS, RegimeSelector, Strategy,
+                      StrategyTable)
+
+
+class Component(NamedTuple):
+    name: str
+    interval: Tuple[float, float]
+
+
+def components(*intervals):
+    return [Component(f'C{i}', interval) for i, interval in enumerate(intervals)]
+
+
+def linear_scan(components, value, scale=1):
+    """The first component whose scaled interval holds value, as _strategize did"""
+    for i, component in enumerate(components):
+        if scale * component.interval[0] <= value <= scale * component.interval[1]:
+            return i
+    return None
+
+
+@pytest.mark.parametrize('intervals, message', [
+    (((0, 0.6), (0.5, 1)), 'overlap'),
+    (((0, 0.4), (0.5, 1)), 'gap'),
+    (((0, 0.6), (0.3, 0.5), (0.5, 1)), 'overlap'),
+    (((0.1, 0.5), (0.5, 1)), 'do not cover'),
+    (((0, 0.5), (0.5, 0.9)), 'do not cover'),
+    (((0, 0.5), (0.5, 0.5), (0.5, 1)), 'Empty'),
+])
+def test_invalid_intervals_are_rejected(intervals, message):
+    with pytest.raises(ValueError, match=message):
+        RegimeSelector(components(*intervals), (0, 1))
+
+
+def test_bounds_resolve_as_the_linear_scan():
+    selector_components = components((0, 0.25), (0.25, 0.5), (0.5, 1))
+    selector = RegimeSelector(selector_components, (0, 1))
+    for scale in (1, 3, 24):
+        for value in [scale * bound for bound in (-0.1, 0, 0.25, 0.5, 1, 1.1)]:
+            assert selector.select(value, scale) == \
+                linear_scan(selector_components, value, scale)
+    # A shared bound belongs to the lower interval
+    assert selector.select(0.25) == 0
+    assert selector.select(0.5) == 1
+    assert selector.select(1.1) is None
+
+
+@pytest.mark.parametrize('component', COMPONENTS)
+def test_configured_selectors_match_the_linear_scan(component):
+    configured = STRATEGY_CONFIGURATION[component]
+    selector = RegimeSelector(configured, DOMAINS[component])
+    rng = np.random.default_rng(0)
+    low, high = DOMAINS[component]
+
+    for cardinality in (1, 7, 24, 100):
+        # Every bound, the counts the indicators sum to, and values off them
+        bounds = [cardinality * bound for c in configured for bound in c.interval]
+        counts = list(range(int(cardinality * low) - 1, int(cardinality * high) + 2))
+        values = rng.uniform(cardinality * (low - 0.1), cardinality * (high + 0.1), 200)
+        for value in bounds + counts + values.tolist():
+            assert selector.select(value, cardinality) == \
+                linear_scan(configured, value, cardinality)
+
+
+def test_table_matches_the_composed_strategies():
+    table = StrategyTable(STRATEGY_CONFIGURATION)
+    components = [STRATEGY_CONFIGURATION[component] for component in COMPONENTS]
+    assert len(table) == np.prod(table.shape)
+
+    corners = [tuple(size - 1 for size in table.shape), (0, 0, 0, 0),
+               (0, 1, 2, 3), (3, 2, 1, 0), (7, 0, 7, 0)]
+    rng = np.random.default_rng(0)
+    indices = corners + [tuple(int(rng.integers(size)) for size in table.shape)
+                         for _ in range(20)]
+    for index in indices:
+        expected = Strategy(*(component[i]
+                              for component, i in zip(components, index)))
+        strategy = table[index]
+        assert strategy.name == expected.name
+        assert strategy.interval == expected.interval
+        for name, _ in PARAMETERS:
+            assert getattr(strategy, name) == getattr(expected, name), name
+            assert table.params[index][name] == getattr(expected, name), name
@@ -0,0 +1,33 @@
+from suspension import SuspensionManager
+
+
+def test_release_follows_a_changed_suspension_time():
+    suspensions = SuspensionManager()
+    for symbol, start in enumerate([0, 10, 20, 30, 40]):
+        suspensions.suspend(symbol, start, 1.0 + symbol)
+
+    assert suspensions.release_expired(45, 100) == []
+    # The strategy shortened suspension_time: every symbol suspended for
+    # over it is released at once, oldest first
+    assert suspensions.release_expired(45, 20) == [0, 1, 2]
+    assert len(suspensions) == 2 and 2 not in suspensions and 3 in suspensions
+
+    # Lengthened again, the remaining ones wait for the new time
+    assert suspensions.release_expired(60, 35) == []
+    assert suspensions.release_expired(66, 35) == [3]
+    assert suspensions.release_expired(76, 35) == [4]
+    assert len(suspensions) == 0
+
+
+def test_resuspended_symbol_expires_from_its_latest_start():
+    suspensions = SuspensionManager()
+    suspensions.suspend(0, 0, 1.0)
+    suspensions.suspend(1, 5, 1.0)
+    suspensions.unsuspend(0)
+    suspensions.suspend(0, 50, 1.0)
+
+    # The stale entry of the first suspension releases nothing
+    assert suspensions.release_expired(30, 10) == [1]
+    assert suspensions.release_expired(55, 10) == []
+    assert suspensions.release_expired(61, 10) == [0]
+    assert suspensions.release_all() == []
@@ -0,0 +1,58 @@
+import numpy as np
+
+from bucket import Bucket
+from market_stream import MarketStream
+from sim_client import SimulatedClient
+from tick_log import TickLog, TickRecorder
+
+PAIRS = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+
+
+def test_replay_round_trip(tmp_path):
+    path = str(tmp_path / 'ticks.bin')
+    client = SimulatedClient.synthetic(PAIRS, 40, interval=10)
+    recorder = TickRecorder(path, index_interval=5, flush_interval=0.01)
+    bucket = Bucket(PAIRS, 10, client=client, clock=client.clock,
+                    recorder=recorder)
+    for _ in range(19):
+        bucket.refresh(0)
+    recorder.close()
+
+    # Reopening appends after the ticks already logged
+    recorder = TickRecorder(path)
+    bucket.recorder = recorder
+    for _ in range(10):
+        bucket.refresh(0)
+    recorder.close()
+
+    log = TickLog(path)
+    pairs, timestamps, prices, changes = log.replay()
+    assert pairs == PAIRS
+    assert len(log) == 30 * len(PAIRS)
+    np.testing.assert_allclose(prices, client.prices[1:31])
+    np.testing.assert_allclose(changes, client.changes[1:31], rtol=1e-6)
+
+    _, timestamps, prices, _ = log.replay(50, 120)
+    np.testing.assert_array_equal(timestamps, np.arange(50, 120, 10))
+    np.testing.assert_allclose(prices, client.prices[5:12])
+
+
+def test_unchanged_board_adds_no_records(tmp_path):
+    path = str(tmp_path / 'ticks.bin')
+    stream = MarketStream(PAIRS, max_staleness=0.1)
+    for pair in PAIRS:
+        stream.board.update(pair, 1.0, 0.5)
+    recorder = TickRecorder(path, flush_interval=0.01)
+    bucket = Bucket(PAIRS, 10, stream=stream, recorder=recorder,
+                    client=SimulatedClient.synthetic(PAIRS, 10))
+
+    # A forced refresh of the unchanged board times out and repeats it
+    bucket.refresh(0)
+    assert bucket.tick == 2
+    stream.board.update('BBBUSDT', 2.0, 0.5)
+    bucket.refresh(0)
+    recorder.close()
+
+    log = TickLog(path)
+    assert len(log) == 2 * len(PAIRS)
+    assert list(log.ticks()['price'][len(PAIRS):]) == [1.0, 2.0, 1.0]
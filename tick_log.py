@@ -0,0 +1,242 @@
+"""
+Append-only binary log of every tick the bot fetches, for backtests and
+post-mortems of exactly what it saw.
+
+The log is a 24-byte header followed by fixed-width 24-byte records of
+(timestamp, symbol id, 24hr change %, price). Every index_interval data
+records are preceded by an index record (symbol INDEX) holding the timestamp
+of the first record after it and the number of ticks written before it, so a
+time range is found by a binary search over the index records alone. Pair
+names are kept by id, one per line, in a .symbols file next to the log.
+
+    python tick_log.py ticks.bin --output replay.npz [--start T] [--end T]
+
+converts a log into the replay format of backtest.py.
+"""
+import argparse
+import os
+import queue
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'BBTICKS1'
+HEADER = np.dtype([('magic', 'S8'), ('record_size', '<u4'),
+                   ('index_interval', '<u4'), ('reserved', '<u8')])
+RECORD = np.dtype([('timestamp', '<f8'), ('symbol', '<u4'), ('change', '<f4'),
+                   ('price', '<f8')])
+INDEX = 0xFFFFFFFF  # symbol id marking index records
+INDEX_INTERVAL = 4096
+
+
+def _symbols_path(path: str) -> str:
+    return path + '.symbols'
+
+
+class TickRecorder:
+    """
+    Append ticks to a log from a background thread. record only copies the
+    tick onto a queue, so the trading loop never waits on the disk; the
+    writer thread flushes whatever is queued every flush_interval seconds.
+    An existing log is appended to, dropping a partly written last record.
+    """
+
+    def __init__(self, path: str, index_interval: int = INDEX_INTERVAL,
+                 flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.itemsize:
+            header = np.fromfile(path, dtype=HEADER, count=1)[0]
+            if header['magic'] != MAGIC or header['record_size'] != RECORD.itemsize:
+                raise ValueError(f'{path} is not a tick log')
+            self.index_interval = int(header['index_interval'])
+            records = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+            self._file = open(path, 'r+b')
+            self._file.truncate(HEADER.itemsize + records * RECORD.itemsize)
+            self._file.seek(0, os.SEEK_END)
+            self._position = records % (self.index_interval + 1)
+            self._ticks = self._count_ticks(records)
+        else:
+            self.index_interval = index_interval
+            self._file = open(path, 'wb')
+            header = np.zeros(1, dtype=HEADER)
+            header[0] = (MAGIC, RECORD.itemsize, index_interval, 0)
+            self._file.write(header.tobytes())
+            self._position = 0
+            self._ticks = 0
+
+        symbols = _symbols_path(path)
+        self.pairs: List[str] = open(symbols).read().split() \
+            if os.path.exists(symbols) else []
+
+        self._checked = False
+        self._queue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _count_ticks(self, records: int) -> int:
+        """Ticks written so far, from the last index record and what follows"""
+        if records == 0:
+            return 0
+        last = (records - 1) // (self.index_interval + 1) * (self.index_interval + 1)
+        tail = np.memmap(self.path, dtype=RECORD, mode='r',
+                         offset=HEADER.itemsize + last * RECORD.itemsize,
+                         shape=(records - last,))
+        return int(tail[0]['price']) + len(np.unique(tail['timestamp'][1:]))
+
+    def record(self, vector: np.ndarray, timestamp: float, pairs: List[str]):
+        """Queue a (symbol id x {price, 24hr %}) tick of the given pairs"""
+        if not self._checked:
+            # Ids are positions in the pair list, it must extend the logged one
+            common = min(len(pairs), len(self.pairs))
+            if list(pairs[:common]) != self.pairs[:common]:
+                raise ValueError(f'{self.path} was recorded with other pairs, '
+                                 f'start a new log')
+            self._checked = True
+        records = np.empty(len(vector), dtype=RECORD)
+        records['timestamp'] = timestamp
+        records['symbol'] = np.arange(len(vector))
+        records['price'] = vector[:, 0]
+        records['change'] = vector[:, 1]
+        self._queue.put((records, pairs[len(self.pairs):] if
+                         len(pairs) > len(self.pairs) else None))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        chunks = []
+        while True:
+            try:
+                records, pairs = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pairs:
+                self._add_pairs(pairs)
+            chunks.append(self._indexed(records))
+        if chunks:
+            self._file.write(b''.join(chunks))
+            self._file.flush()
+
+    def _add_pairs(self, pairs: List[str]):
+        new = [pair for pair in pairs if pair not in self.pairs]
+        if new:
+            with open(_symbols_path(self.path), 'a') as f:
+                f.write(''.join(f'{pair}\n' for pair in new))
+            self.pairs.extend(new)
+
+    def _indexed(self, records: np.ndarray) -> bytes:
+        """Serialize one tick, inserting index records where they fall due"""
+        parts = []
+        start = 0
+        while start < len(records):
+            if self._position == 0:
+                index = np.zeros(1, dtype=RECORD)
+                index[0] = (records[start]['timestamp'], INDEX, 0, self._ticks)
+                parts.append(index.tobytes())
+                self._position = 1
+            end = start + self.index_interval + 1 - self._position
+            parts.append(records[start:end].tobytes())
+            self._position = (self._position + len(records[start:end])) % \
+                (self.index_interval + 1)
+            start = end
+        self._ticks += 1
+        return b''.join(parts)
+
+    def close(self):
+        """Write everything queued and stop the writer thread"""
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+
+
+class TickLog:
+    """Read a tick log in place through a memory map"""
+
+    def __init__(self, path: str):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header[0]['magic'] != MAGIC or \
+                header[0]['record_size'] != RECORD.itemsize:
+            raise ValueError(f'{path} is not a tick log')
+        self.index_interval = int(header[0]['index_interval'])
+
+        count = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+        # Every record, index records included, without copying
+        self.records = np.memmap(path, dtype=RECORD, mode='r',
+                                 offset=HEADER.itemsize, shape=(count,)) \
+            if count else np.empty(0, dtype=RECORD)
+        self.index = self.records[::self.index_interval + 1]
+
+        symbols = _symbols_path(path)
+        self.pairs: List[str] = open(symbols).read().split() \
+            if os.path.exists(symbols) else []
+
+    def __len__(self) -> int:
+        return len(self.records) - len(self.index)
+
+    def ticks(self, start: Optional[float] = None,
+              end: Optional[float] = None) -> np.ndarray:
+        """
+        Data records with start <= timestamp < end. Only the segments of the
+        range are read, self.records views the whole log without copying.
+        """
+        stride = self.index_interval + 1
+        # A tick can straddle an index record, so start from the segment
+        # before the first index at start
+        lo = 0 if start is None else \
+            max(int(np.searchsorted(self.index['timestamp'], start, 'left')) - 1, 0)
+        hi = len(self.index) if end is None else \
+            int(np.searchsorted(self.index['timestamp'], end, 'left'))
+        records = self.records[lo * stride:hi * stride]
+        mask = records['symbol'] != INDEX
+        if start is not None:
+            mask &= records['timestamp'] >= start
+        if end is not None:
+            mask &= records['timestamp'] < end
+        return records[mask]
+
+    def replay(self, start: Optional[float] = None, end: Optional[float] = None
+               ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (pairs, timestamps, prices, changes) of the ticks in the range, as
+        load_replay returns them. Pairs missing from a tick keep their last
+        price, and are nan before their first.
+        """
+        records = self.ticks(start, end)
+        timestamps, rows = np.unique(records['timestamp'], return_inverse=True)
+        prices = np.full((len(timestamps), len(self.pairs)), np.nan)
+        changes = np.full((len(timestamps), len(self.pairs)), np.nan)
+        prices[rows, records['symbol']] = records['price']
+        changes[rows, records['symbol']] = records['change']
+
+        # Forward fill every column from its last recorded tick
+        recorded = ~np.isnan(prices)
+        last = np.maximum.accumulate(
+            np.where(recorded, np.arange(len(timestamps))[:, None], 0), axis=0)
+        columns = np.arange(len(self.pairs))
+        return (list(self.pairs), timestamps, prices[last, columns],
+                changes[last, columns])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('log')
+    parser.add_argument('--output', required=True, help='.npz replay to write')
+    parser.add_argument('--start', type=float)
+    parser.add_argument('--end', type=float)
+    args = parser.parse_args()
+
+    pairs, timestamps, prices, changes = \
+        TickLog(args.log).replay(args.start, args.end)
+    np.savez(args.output, pairs=np.array(pairs), timestamps=timestamps,
+             prices=prices, changes=changes)
+    print(f'{len(timestamps)} ticks of {len(pairs)} pairs written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Price history to start the bot trade-ready: the snapshot queue and the
+strategy queue are backfilled from it (see Bot.warm_start) instead of filling
+live over SNAPSHOT_QUEUE_SIZE x SNAPSHOT_REFRESH_RATE seconds.
+
+History is read from the tick log of earlier runs (tick_log.py) when it covers
+the window, and from klines (klines.py) otherwise.
+"""
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from klines import BINANCE_API_URL, KlineDownloader, KlineStore
+from sim_client import DAY
+from strategies_avg_baselines import SNAPSHOT_QUEUE_SIZE, SNAPSHOT_REFRESH_RATE
+from tick_log import TickLog
+
+History = Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]
+
+
+def snapshots(pairs: Sequence[str], history: History, now: float,
+              count: int = SNAPSHOT_QUEUE_SIZE - 1,
+              interval: float = SNAPSHOT_REFRESH_RATE
+              ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The (snapshot x pair x {price, 24hr %}) snapshots and their timestamps
+    at every interval up to count intervals before now, oldest first, in the
+    order of pairs. Each is the latest tick of history at its time, slots
+    without a tick in the interval before them are left out.
+    """
+    names, timestamps, prices, changes = history
+    index = {name: i for i, name in enumerate(names)}
+    missing = [pair for pair in pairs if pair not in index]
+    if missing:
+        raise ValueError(f'No history of {missing}')
+    columns = [index[pair] for pair in pairs]
+
+    targets = now - interval * np.arange(count, 0, -1)
+    rows = np.searchsorted(timestamps, targets, 'right') - 1
+    found = rows >= 0
+    found[found] &= timestamps[rows[found]] > targets[found] - interval
+    rows = rows[found]
+
+    vectors = np.stack([prices[rows][:, columns], changes[rows][:, columns]],
+                       axis=2)
+    return vectors, np.asarray(timestamps[rows], dtype=float)
+
+
+def load_history(pairs: Sequence[str], now: float,
+                 count: int = SNAPSHOT_QUEUE_SIZE - 1,
+                 tick_log: Optional[str] = None,
+                 kline_directory: Optional[str] = None,
+                 kline_interval: str = '1m',
+                 base_url: str = BINANCE_API_URL) -> Optional[History]:
+    """
+    History of pairs over the count snapshot intervals before now, from
+    tick_log when it holds them all, else from klines brought up to date in
+    kline_directory. None when neither source is given.
+    """
+    start = now - (count + 1) * SNAPSHOT_REFRESH_RATE
+
+    if tick_log is not None and os.path.exists(tick_log):
+        log = TickLog(tick_log)
+        if set(pairs) <= set(log.pairs):
+            history = log.replay(start, now)
+            timestamps = history[1]
+            if len(timestamps) and timestamps[0] <= start + SNAPSHOT_REFRESH_RATE \
+                    and timestamps[-1] > now - SNAPSHOT_REFRESH_RATE:
+                print(f'History loaded from {tick_log}')
+                return history
+
+    if kline_directory is not None:
+        store = KlineStore(kline_directory, kline_interval)
+        # A day more for the 24hr changes of the first snapshots
+        KlineDownloader(store, base_url).download(list(pairs), start - DAY, now)
+        print(f'History loaded from {kline_interval} klines')
+        return store.replay(list(pairs), start, now)
+
+    return None